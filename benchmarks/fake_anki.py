@@ -0,0 +1,451 @@
+"""
+In-process stand-in for the parts of Anki the addon uses.
+FakeCollection implements the mw.col surface called by core.py
+(decks, db, sched, undo entries, find_cards) on plain Python data and
+counts every call, so the addon can be benchmarked without the Anki GUI
+on collections of any size.
+
+The undo queue follows the backend's rules: legacy writes that are not
+undoable clear it, and merging into an undo entry that is no longer in
+the queue fails, as it does in Anki.
+"""
+
+import datetime
+import json
+import re
+import sys
+import types
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+# First card / deck / preset ids of generated collections
+CARD_ID_BASE = 1_600_000_000_000
+DECK_ID_BASE = 1_500_000_000_000
+CONFIG_ID_BASE = 1_400_000_000_000
+
+# Card queues, as in Anki
+QUEUE_NEW = 0
+QUEUE_REVIEW = 2
+QUEUE_SUSPENDED = -1
+QUEUE_SCHED_BURIED = -2
+
+# Queues of every ten cards of a deck: 4 new, 5 review, 1 suspended
+_QUEUE_PATTERN = (0, 0, 0, 0, 2, 2, 2, 2, 2, -1)
+
+_IN_LIST = re.compile(r"\bin \(([^)]*)\)")
+
+
+class DeckNameId(NamedTuple):
+    """Entry of decks.all_names_and_ids()."""
+
+    name: str
+    id: int
+
+
+class DueTreeNode:
+    """Node of sched.deck_due_tree()."""
+
+    __slots__ = ("deck_id", "name", "new_count", "children")
+
+    def __init__(self, deck_id: int, name: str, new_count: int = 0) -> None:
+        self.deck_id = deck_id
+        self.name = name
+        self.new_count = new_count
+        self.children: List["DueTreeNode"] = []
+
+
+def counted(method):
+    """Count the calls of a backend method in the collection's counter."""
+    name = method.__name__
+
+    def wrapper(self, *args, **kwargs):
+        self.col.calls[f"{self.PREFIX}.{name}"] += 1
+        return method(self, *args, **kwargs)
+
+    wrapper.__name__ = name
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
+
+def _ids_in(sql: str) -> List[int]:
+    """Get the ids of the "in (...)" list of a query."""
+    match = _IN_LIST.search(sql)
+    if not match or not match.group(1).strip():
+        return []
+    return [int(item_id) for item_id in match.group(1).split(",")]
+
+
+class FakeDecks:
+    """col.decks: decks and presets stored as JSON, like the backend does."""
+
+    PREFIX = "decks"
+
+    def __init__(self, col: "FakeCollection") -> None:
+        self.col = col
+        self.decks: Dict[int, str] = {}
+        self.configs: Dict[int, str] = {}
+        self.names: Dict[int, str] = {}
+        self.deck_mtime: Dict[int, int] = {}
+        self.config_mtime: Dict[int, int] = {}
+
+    def _add_deck(self, deck: dict) -> None:
+        self.decks[deck["id"]] = json.dumps(deck)
+        self.names[deck["id"]] = deck["name"]
+        self.deck_mtime[deck["id"]] = self.col.mtime
+
+    def _add_config(self, config: dict) -> None:
+        self.configs[config["id"]] = json.dumps(config)
+        self.config_mtime[config["id"]] = self.col.mtime
+
+    def limit_of(self, deck: dict) -> int:
+        """New-card limit the scheduler applies to a deck today."""
+        today_limit = deck.get("newLimitToday")
+        if today_limit and today_limit.get("today") == self.col.sched.today:
+            return today_limit["limit"]
+
+        if "new" in deck and "perDay" in deck["new"]:
+            return deck["new"]["perDay"]
+
+        config = json.loads(self.configs.get(deck.get("conf", 1), self.configs[1]))
+        return config["new"]["perDay"]
+
+    @counted
+    def all(self) -> List[dict]:
+        return [json.loads(deck) for deck in self.decks.values()]
+
+    @counted
+    def all_config(self) -> List[dict]:
+        return [json.loads(config) for config in self.configs.values()]
+
+    @counted
+    def all_names_and_ids(self, include_filtered: bool = True) -> List[DeckNameId]:
+        return [DeckNameId(name, deck_id) for deck_id, name in self.names.items()]
+
+    @counted
+    def get(self, deck_id: int, default: bool = True) -> Optional[dict]:
+        deck = self.decks.get(deck_id)
+        if deck is None:
+            return json.loads(self.decks[1]) if default else None
+        return json.loads(deck)
+
+    @counted
+    def get_config(self, config_id: int) -> Optional[dict]:
+        config = self.configs.get(config_id)
+        return json.loads(config) if config is not None else None
+
+    @counted
+    def save(self, deck: dict) -> None:
+        # Legacy write: not undoable
+        self.col.mtime += 1
+        self._add_deck(deck)
+        self.col.undo_steps.clear()
+
+    @counted
+    def update_dict(self, deck: dict) -> None:
+        self.col.mtime += 1
+        self._add_deck(deck)
+        self.col.push_undo_step()
+
+    @counted
+    def update_config(self, config: dict) -> None:
+        # Legacy write: not undoable
+        self.col.mtime += 1
+        self._add_config(config)
+        self.col.undo_steps.clear()
+
+    @counted
+    def flush(self) -> None:
+        # Legacy API: writes are already saved
+        pass
+
+
+class FakeDB:
+    """col.db: answers the queries the addon makes."""
+
+    PREFIX = "db"
+
+    def __init__(self, col: "FakeCollection") -> None:
+        self.col = col
+
+    def _table_mtimes(self, sql: str) -> Dict[int, int]:
+        decks = self.col.decks
+        return decks.config_mtime if "deck_config" in sql else decks.deck_mtime
+
+    @counted
+    def first(self, sql: str, *args) -> Optional[tuple]:
+        if sql.startswith("select count(), max(mtime_secs) from"):
+            mtimes = self._table_mtimes(sql)
+            return len(mtimes), max(mtimes.values(), default=None)
+        raise NotImplementedError(sql)
+
+    @counted
+    def scalar(self, sql: str, *args):
+        if "max(mtime_secs)" in sql:
+            decks = self.col.decks
+            return max(max(decks.config_mtime.values()), max(decks.deck_mtime.values()))
+        raise NotImplementedError(sql)
+
+    @counted
+    def list(self, sql: str, *args) -> List[int]:
+        col = self.col
+
+        if "where mtime_secs > ?" in sql:
+            return [
+                item_id for item_id, mtime in self._table_mtimes(sql).items() if mtime > args[0]
+            ]
+
+        if sql.startswith("select id from cards where did = ? and queue = 0"):
+            deck_id, limit = args
+            return list(col.deck_new_cards(deck_id, limit))
+
+        if "queue = 0 and did in" in sql:
+            card_ids = []
+            for deck_id in _ids_in(sql):
+                card_ids.extend(col.deck_new_cards(deck_id))
+            return card_ids
+
+        for queue in (QUEUE_NEW, QUEUE_SCHED_BURIED):
+            if f"queue = {queue} and id in" in sql:
+                return [card_id for card_id in _ids_in(sql) if col.queue_of(card_id) == queue]
+
+        raise NotImplementedError(sql)
+
+
+class FakeScheduler:
+    """col.sched: scheduler day, deck tree and burying."""
+
+    PREFIX = "sched"
+
+    def __init__(self, col: "FakeCollection", date: datetime.date) -> None:
+        self.col = col
+        self.today = 1000
+        self.day_cutoff = 0
+        self.date = date
+        self.set_date(date)
+
+    def set_date(self, date: datetime.date) -> None:
+        """Move to another day (next day starts at 4 AM)."""
+        self.today += (date - self.date).days
+        self.date = date
+        cutoff = datetime.datetime.combine(date, datetime.time(4)) + datetime.timedelta(days=1)
+        self.day_cutoff = int(cutoff.timestamp())
+
+    @counted
+    def deck_due_tree(self) -> DueTreeNode:
+        col = self.col
+        decks = col.decks
+        root = DueTreeNode(0, "")
+        nodes = {"": root}
+
+        # Parents sort before their children
+        for deck_id, name in sorted(decks.names.items(), key=lambda item: item[1]):
+            deck = json.loads(decks.decks[deck_id])
+            new_count = min(col.deck_new_count(deck_id), decks.limit_of(deck))
+            node = DueTreeNode(deck_id, name, new_count)
+            nodes[name] = node
+            nodes.get(name.rpartition("::")[0], root).children.append(node)
+
+        return root
+
+    @counted
+    def bury_cards(self, card_ids: Iterable[int], manual: bool = True) -> None:
+        queue = QUEUE_SCHED_BURIED if not manual else -3
+        for card_id in card_ids:
+            self.col.queues[card_id - CARD_ID_BASE] = queue
+        self.col.push_undo_step()
+
+    @counted
+    def unbury_cards(self, card_ids: Iterable[int]) -> None:
+        for card_id in card_ids:
+            if self.col.queue_of(card_id) in (QUEUE_SCHED_BURIED, -3):
+                self.col.queues[card_id - CARD_ID_BASE] = QUEUE_NEW
+        self.col.push_undo_step()
+
+
+class FakeCollection:
+    """
+    Collection with generated decks, presets and cards.
+
+    Decks are grouped ten to a top-level deck ("Subject 0001" and its
+    "Subject 0001::Topic 01".. subdecks), presets are shared by about 200
+    decks each, and 5% of the decks override the new-card limit. Every
+    deck holds the same number of cards, 40% of them new.
+
+    Calls made through decks, db, sched and the collection itself are
+    counted in `calls`.
+    """
+
+    PREFIX = "col"
+
+    def __init__(
+        self,
+        deck_count: int,
+        card_count: int,
+        date: datetime.date,
+        path: str = "/tmp/benchmark.anki2",
+    ) -> None:
+        self.col = self
+        self.path = path
+        self.calls: Counter = Counter()
+        self.undo_steps: List[int] = []
+        self._last_undo_step = 0
+        self.mtime = 1_700_000_000
+        self.decks = FakeDecks(self)
+        self.db = FakeDB(self)
+        self.sched = FakeScheduler(self, date)
+        self.cards_per_deck = max(1, card_count // max(1, deck_count))
+        self._deck_index: Dict[int, int] = {}
+
+        preset_count = max(2, deck_count // 200)
+        self.decks._add_config({"id": 1, "name": "Default", "new": {"perDay": 20}})
+        for index in range(1, preset_count):
+            self.decks._add_config({
+                "id": CONFIG_ID_BASE + index,
+                "name": f"Preset {index:03}",
+                "new": {"perDay": 10 + index % 20},
+            })
+
+        self.decks._add_deck({"id": 1, "name": "Default", "conf": 1, "dyn": 0})
+        for index in range(deck_count):
+            root, child = divmod(index, 10)
+            name = f"Subject {root:04}" if child == 0 else f"Subject {root:04}::Topic {child:02}"
+            preset = index % preset_count
+            deck = {
+                "id": DECK_ID_BASE + index,
+                "name": name,
+                "conf": 1 if preset == 0 else CONFIG_ID_BASE + preset,
+                "dyn": 0,
+            }
+            if index % 20 == 7:
+                deck["new"] = {"perDay": 15}
+            self.decks._add_deck(deck)
+            self._deck_index[deck["id"]] = index
+
+        pattern = array("b", _QUEUE_PATTERN)
+        deck_queues = pattern * (self.cards_per_deck // len(pattern) + 1)
+        del deck_queues[self.cards_per_deck:]
+        self.queues = deck_queues * deck_count
+
+    def _card_range(self, deck_id: int) -> range:
+        index = self._deck_index.get(deck_id)
+        if index is None:
+            return range(0)
+        start = index * self.cards_per_deck
+        return range(start, start + self.cards_per_deck)
+
+    def queue_of(self, card_id: int) -> Optional[int]:
+        """Queue of a card, None if it does not exist."""
+        index = card_id - CARD_ID_BASE
+        if 0 <= index < len(self.queues):
+            return self.queues[index]
+        return None
+
+    def deck_new_count(self, deck_id: int) -> int:
+        """Number of new cards of a deck (not counting subdecks)."""
+        cards = self._card_range(deck_id)
+        return self.queues[cards.start:cards.stop].count(QUEUE_NEW)
+
+    def deck_new_cards(self, deck_id: int, limit: Optional[int] = None) -> Iterable[int]:
+        """Ids of the new cards of a deck in due order."""
+        taken = 0
+        for index in self._card_range(deck_id):
+            if limit is not None and taken >= limit:
+                return
+            if self.queues[index] == QUEUE_NEW:
+                taken += 1
+                yield CARD_ID_BASE + index
+
+    def advance_to(self, date: datetime.date) -> None:
+        """Move to another day; cards buried by the scheduler come back."""
+        self.sched.set_date(date)
+        buried = array("b", [QUEUE_SCHED_BURIED]).tobytes()
+        new = array("b", [QUEUE_NEW]).tobytes()
+        self.queues = array("b", self.queues.tobytes().replace(buried, new))
+
+    @property
+    def total_calls(self) -> int:
+        """Number of backend calls made so far."""
+        return sum(self.calls.values())
+
+    @counted
+    def find_cards(self, query: str) -> List[int]:
+        if query != "is:new -is:suspended":
+            raise NotImplementedError(query)
+        return [
+            CARD_ID_BASE + index
+            for index, queue in enumerate(self.queues)
+            if queue in (QUEUE_NEW, QUEUE_SCHED_BURIED)
+        ]
+
+    @counted
+    def v3_scheduler(self) -> bool:
+        return True
+
+    def push_undo_step(self) -> int:
+        """Add an undoable operation to the undo queue."""
+        self._last_undo_step += 1
+        self.undo_steps.append(self._last_undo_step)
+        return self._last_undo_step
+
+    @counted
+    def add_custom_undo_entry(self, name: str) -> int:
+        return self.push_undo_step()
+
+    @counted
+    def merge_undo_entries(self, target: int) -> None:
+        if target not in self.undo_steps:
+            raise RuntimeError("target undo op not found")
+        del self.undo_steps[self.undo_steps.index(target) + 1:]
+
+
+class FakeAddonManager:
+    """mw.addonManager: keeps the addon config in memory."""
+
+    def __init__(self, config: dict) -> None:
+        self.config = config
+
+    def getConfig(self, module: str) -> dict:
+        return self.config
+
+    def writeConfig(self, module: str, config: dict) -> None:
+        self.config = config
+
+    def setConfigUpdatedAction(self, module: str, action) -> None:
+        pass
+
+
+class FakeProfileManager:
+    """mw.pm: only the interface language is read."""
+
+    def __init__(self, language: str = "en_US") -> None:
+        self.meta = {"defaultLang": language}
+
+
+class FakeMainWindow:
+    """Stand-in for aqt.mw."""
+
+    def __init__(self, col: FakeCollection, config: dict) -> None:
+        self.col = col
+        self.addonManager = FakeAddonManager(config)
+        self.pm = FakeProfileManager()
+
+
+def install_anki_utils() -> None:
+    """
+    Provide anki.utils.ids2str / point_version when Anki is not installed.
+    """
+    try:
+        import anki.utils  # noqa: F401
+        return
+    except ImportError:
+        pass
+
+    utils = types.ModuleType("anki.utils")
+    utils.ids2str = lambda ids: "(%s)" % ",".join(str(item_id) for item_id in ids)
+    utils.point_version = lambda: 66
+
+    anki = types.ModuleType("anki")
+    anki.utils = utils
+    sys.modules.setdefault("anki", anki)
+    sys.modules["anki.utils"] = utils
@@ -0,0 +1,297 @@
+"""
+Benchmarks of the Weekend Blocker core on generated collections.
+
+Runs the block, restore, pause and status operations, with and without
+deck rules, against FakeCollection stand-ins of several sizes, measuring
+wall time and the number of backend calls, and compares them with the
+recorded baselines:
+
+    python -m benchmarks.run_benchmarks                 # tiny..large
+    python -m benchmarks.run_benchmarks --sizes huge    # 20k decks / 2M cards
+    python -m benchmarks.run_benchmarks --record        # update baselines.json
+
+Exits with status 1 if a benchmark makes more backend calls than its
+baseline, or has no baseline. Call counts are exact, so they are the
+gate; wall times vary from run to run and between machines, so being
+slower than the baseline by more than --tolerance is only reported.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from .fake_anki import FakeCollection, FakeMainWindow, install_anki_utils
+
+install_anki_utils()
+
+from weekend_blocker import core, storage, utils  # noqa: E402
+
+BASELINES_FILE = os.path.join(os.path.dirname(__file__), "baselines.json")
+
+# Collection sizes: name -> (decks, cards)
+SIZES = {
+    "tiny": (10, 1_000),
+    "small": (100, 10_000),
+    "medium": (1_000, 100_000),
+    "large": (5_000, 500_000),
+    "huge": (20_000, 2_000_000),
+}
+DEFAULT_SIZES = ("tiny", "small", "medium", "large")
+
+SATURDAY = datetime.date(2025, 1, 4)
+MONDAY = datetime.date(2025, 1, 6)
+WEDNESDAY = datetime.date(2025, 1, 8)
+
+# Wall-time differences below this are noise, whatever the tolerance
+MIN_SLACK_SECONDS = 0.005
+
+
+class Scenario(NamedTuple):
+    """One benchmarked operation."""
+
+    name: str
+    date: datetime.date
+    config: dict
+    # Runs before the timer starts
+    setup: Optional[Callable[[FakeCollection], None]]
+    run: Callable[[], object]
+
+
+# Keeps one subject open, so its presets are shared with blocked decks
+DECK_RULES = {
+    "limit_mode": "preset",
+    "deck_rules": [
+        {"deck": "Subject 0000", "blocked_weekdays": []},
+        {"regex": "Subject 0001::Topic 0[1-3]", "blocked_weekdays": [4, 5, 6]},
+    ],
+}
+
+
+def _block(col: FakeCollection) -> None:
+    core.run_automatic_check()
+
+
+def _block_then_status(col: FakeCollection) -> None:
+    core.run_automatic_check()
+    core.get_status_info()
+
+
+def _block_then_monday(col: FakeCollection) -> None:
+    core.run_automatic_check()
+    col.advance_to(MONDAY)
+
+
+SCENARIOS = (
+    Scenario("block", SATURDAY, {"limit_mode": "preset"}, None, core.run_automatic_check),
+    Scenario(
+        "block_today_only", SATURDAY, {"limit_mode": "today_only"}, None, core.run_automatic_check
+    ),
+    Scenario("recheck", SATURDAY, {"limit_mode": "preset"}, _block, core.run_automatic_check),
+    Scenario("block_rules", SATURDAY, DECK_RULES, None, core.run_automatic_check),
+    Scenario("recheck_rules", SATURDAY, DECK_RULES, _block, core.run_automatic_check),
+    Scenario(
+        "restore", SATURDAY, {"limit_mode": "preset"}, _block_then_monday, core.run_automatic_check
+    ),
+    Scenario("pause", WEDNESDAY, {}, None, core.pause_all_new_cards),
+    Scenario("status", SATURDAY, {"limit_mode": "preset"}, _block, core.get_status_info),
+    Scenario(
+        "status_cached",
+        SATURDAY,
+        {"limit_mode": "preset"},
+        _block_then_status,
+        core.get_status_info,
+    ),
+)
+
+
+def run_scenario(scenario: Scenario, size: str, state_dir: str, repeat: int = 1) -> dict:
+    """
+    Run one scenario on freshly generated collections.
+
+    Args:
+        scenario: Scenario to run
+        size: Key of SIZES
+        state_dir: Folder for the addon's sidecar state
+        repeat: Number of runs; the fastest one is reported
+
+    Returns:
+        dict: "seconds" and "calls" of the measured operation, plus the
+            calls by method in "by_method"
+    """
+    deck_count, card_count = SIZES[size]
+    best = None
+
+    for run in range(repeat):
+        col = FakeCollection(
+            deck_count,
+            card_count,
+            scenario.date,
+            path=os.path.join(state_dir, f"{size}-{scenario.name}-{run}.anki2"),
+        )
+        config = {**utils.DEFAULT_CONFIG, "log_actions": False, **scenario.config}
+
+        utils.mw = FakeMainWindow(col, config)
+        utils.invalidate_addon_config()
+        core.invalidate_check_plan()
+
+        if scenario.setup:
+            scenario.setup(col)
+
+        col.calls.clear()
+        start = time.perf_counter()
+        scenario.run()
+        seconds = time.perf_counter() - start
+
+        if best is None or seconds < best["seconds"]:
+            best = {
+                "seconds": round(seconds, 4),
+                "calls": col.total_calls,
+                "by_method": dict(sorted(col.calls.items())),
+            }
+
+    return best
+
+
+def check_regression(result: dict, baseline: Optional[dict]) -> Optional[str]:
+    """
+    Compare the backend calls of a result with its baseline.
+
+    Args:
+        result: Result of run_scenario()
+        baseline: Recorded result, or None if there is none
+
+    Returns:
+        str describing the regression, or None
+    """
+    if baseline is None:
+        return "no baseline (run with --record)"
+
+    if result["calls"] > baseline["calls"]:
+        return f"{result['calls']} backend calls (baseline {baseline['calls']})"
+
+    return None
+
+
+def check_slowdown(result: dict, baseline: Optional[dict], tolerance: float) -> Optional[str]:
+    """
+    Compare the wall time of a result with its baseline.
+
+    Args:
+        result: Result of run_scenario()
+        baseline: Recorded result, or None if there is none
+        tolerance: Allowed relative slowdown (0.5 = 50%)
+
+    Returns:
+        str describing the slowdown, or None
+    """
+    if baseline is None:
+        return None
+
+    allowed = baseline["seconds"] * (1 + tolerance) + MIN_SLACK_SECONDS
+    if result["seconds"] > allowed:
+        return f"{result['seconds']:.4f}s (baseline {baseline['seconds']:.4f}s)"
+
+    return None
+
+
+def load_baselines() -> Dict[str, dict]:
+    """Read baselines.json (empty if missing)."""
+    try:
+        with open(BASELINES_FILE, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the benchmarks and return the exit status."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--sizes", nargs="+", choices=sorted(SIZES), default=list(DEFAULT_SIZES),
+        help="collection sizes to run"
+    )
+    parser.add_argument(
+        "--scenarios", nargs="+", choices=[scenario.name for scenario in SCENARIOS],
+        help="scenarios to run (default: all)"
+    )
+    parser.add_argument(
+        "--tolerance", type=float, default=0.5,
+        help="wall-time slowdown over the baseline reported as a warning (default: 0.5 = 50%%)"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3,
+        help="runs per benchmark, the fastest one counts (default: 3)"
+    )
+    parser.add_argument(
+        "--record", action="store_true", help="write the results to baselines.json"
+    )
+    args = parser.parse_args(argv)
+
+    baselines = load_baselines()
+    regressions: List[Tuple[str, str]] = []
+    slowdowns: List[Tuple[str, str]] = []
+    previous_state_dir = storage.STATE_DIR
+    previous_mw = utils.mw
+
+    print(f"{'benchmark':<28}{'seconds':>10}{'calls':>8}  baseline")
+
+    try:
+        with tempfile.TemporaryDirectory() as state_dir:
+            storage.STATE_DIR = state_dir
+
+            for size in args.sizes:
+                for scenario in SCENARIOS:
+                    if args.scenarios and scenario.name not in args.scenarios:
+                        continue
+
+                    key = f"{size}/{scenario.name}"
+                    result = run_scenario(scenario, size, state_dir, max(1, args.repeat))
+                    baseline = baselines.get(key)
+
+                    note = "-"
+                    if baseline:
+                        note = f"{baseline['seconds']:.4f}s {baseline['calls']} calls"
+                    print(f"{key:<28}{result['seconds']:>10.4f}{result['calls']:>8}  {note}")
+
+                    regression = check_regression(result, baseline)
+                    if regression:
+                        regressions.append((key, regression))
+
+                    slowdown = check_slowdown(result, baseline, args.tolerance)
+                    if slowdown:
+                        slowdowns.append((key, slowdown))
+
+                    if args.record:
+                        baselines[key] = {"seconds": result["seconds"], "calls": result["calls"]}
+    finally:
+        storage.STATE_DIR = previous_state_dir
+        utils.mw = previous_mw
+
+    if args.record:
+        with open(BASELINES_FILE, "w", encoding="utf-8") as f:
+            json.dump(dict(sorted(baselines.items())), f, indent=2)
+            f.write("\n")
+        print(f"\nBaselines written to {BASELINES_FILE}")
+        return 0
+
+    if slowdowns:
+        print("\nSlower than the baseline (wall time varies, not a failure):")
+        for key, slowdown in slowdowns:
+            print(f"  {key}: {slowdown}")
+
+    if regressions:
+        print("\nRegressions:")
+        for key, regression in regressions:
+            print(f"  {key}: {regression}")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,25 +6,42 @@ Script de teste para verificar a lógica do Weekend Blocker sem o Anki.
 
 import datetime
 
+from benchmarks.fake_anki import (
+    CONFIG_ID_BASE,
+    DECK_ID_BASE,
+    FakeCollection,
+    FakeMainWindow,
+    install_anki_utils,
+)
 
-def is_weekend() -> bool:
-    """Check if today is Saturday (5) or Sunday (6)."""
-    today = datetime.datetime.now().weekday()
-    return today in [5, 6]
+install_anki_utils()
 
+from weekend_blocker import core, storage, utils  # noqa: E402
+from weekend_blocker.calendar_index import CalendarIndex  # noqa: E402
+from weekend_blocker.rules import CompiledRules  # noqa: E402
+from weekend_blocker.schedule import (  # noqa: E402
+    BLOCK,
+    PAUSE,
+    RESTORE,
+    ScheduleRules,
+    decide,
+    decide_many,
+    decide_range,
+    decide_year,
+)
 
-def get_day_name() -> str:
-    """Get the current day name in Portuguese."""
-    days = {
-        0: "Segunda-feira",
-        1: "Terça-feira",
-        2: "Quarta-feira",
-        3: "Quinta-feira",
-        4: "Sexta-feira",
-        5: "Sábado",
-        6: "Domingo"
-    }
-    return days[datetime.datetime.now().weekday()]
+SATURDAY = datetime.date(2025, 1, 4)
+MONDAY = datetime.date(2025, 1, 6)
+
+DAY_NAMES = {
+    0: "Segunda-feira",
+    1: "Terça-feira",
+    2: "Quarta-feira",
+    3: "Quinta-feira",
+    4: "Sexta-feira",
+    5: "Sábado",
+    6: "Domingo"
+}
 
 
 def test_weekend_logic():
@@ -34,16 +51,15 @@ def test_weekend_logic():
     print("=" * 50)
     print()
 
-    today = datetime.datetime.now()
-    day_name = get_day_name()
-    is_weekend_today = is_weekend()
+    today = datetime.date.today()
+    target = decide(today)
 
-    print(f"📅 Data atual: {today.strftime('%Y-%m-%d %H:%M:%S')}")
-    print(f"📆 Dia da semana: {day_name}")
-    print(f"🏖️  É fim de semana? {'Sim' if is_weekend_today else 'Não'}")
+    print(f"📅 Data atual: {today.strftime('%Y-%m-%d')}")
+    print(f"📆 Dia da semana: {DAY_NAMES[today.weekday()]}")
+    print(f"🏖️  É fim de semana? {'Sim' if target == BLOCK else 'Não'}")
     print()
 
-    if is_weekend_today:
+    if target == BLOCK:
         print("✅ Ação esperada: BLOQUEAR novos cards (limite = 0)")
     else:
         print("✅ Ação esperada: PERMITIR novos cards (restaurar limites)")
@@ -55,27 +71,218 @@ def test_weekend_logic():
     print()
 
     # Simular a semana inteira
-    for day_offset in range(7):
+    for day_offset, day_target in enumerate(decide_range(today, 7)):
         test_date = today + datetime.timedelta(days=day_offset)
-        test_weekday = test_date.weekday()
-        test_day_name = {
-            0: "Segunda-feira",
-            1: "Terça-feira",
-            2: "Quarta-feira",
-            3: "Quinta-feira",
-            4: "Sexta-feira",
-            5: "Sábado",
-            6: "Domingo"
-        }[test_weekday]
-
-        is_weekend_day = test_weekday in [5, 6]
-        action = "🚫 BLOQUEAR" if is_weekend_day else "✅ PERMITIR"
-
-        print(f"{test_date.strftime('%Y-%m-%d')} | {test_day_name:15} | {action}")
+        action = "🚫 BLOQUEAR" if day_target == BLOCK else "✅ PERMITIR"
+
+        print(f"{test_date.strftime('%Y-%m-%d')} | {DAY_NAMES[test_date.weekday()]:15} | {action}")
+
+        assert day_target == (BLOCK if test_date.weekday() in (5, 6) else RESTORE)
 
     print()
     print("=" * 50)
 
 
+def test_custom_rules():
+    """Test custom blocked weekdays and manual pause."""
+    friday = datetime.date(2025, 11, 7)
+    saturday = datetime.date(2025, 11, 8)
+
+    rules = ScheduleRules(blocked_weekdays=frozenset((4, 5, 6)))
+    assert decide(friday, rules) == BLOCK
+    assert decide(friday) == RESTORE
+
+    paused = ScheduleRules(manual_pause=True)
+    assert decide_many([friday, saturday], paused) == [PAUSE, PAUSE]
+
+    config_rules = ScheduleRules.from_config({"blocked_weekdays": [4]})
+    assert decide_many([friday, saturday], config_rules) == [BLOCK, RESTORE]
+
+
+def test_decide_year():
+    """Test that a whole year is decided in one call."""
+    targets = decide_year(2025)
+
+    assert len(targets) == 365
+    assert targets.count(BLOCK) == 104
+    assert targets[0] == RESTORE  # 2025-01-01 was a Wednesday
+    assert targets[3] == BLOCK  # 2025-01-04 was a Saturday
+
+
+def test_blocked_dates(tmp_path, capsys):
+    """Test holidays, ranges and .ics files on top of the weekdays."""
+    (tmp_path / "holidays.ics").write_text(
+        "BEGIN:VCALENDAR\r\n"
+        "BEGIN:VEVENT\r\n"
+        "DTSTART;VALUE=DATE:20250421\r\n"
+        "DTEND;VALUE=DATE:20250422\r\n"
+        "END:VEVENT\r\n"
+        "BEGIN:VEVENT\r\n"
+        "DTSTART;VALUE=DATE:20201225\r\n"
+        "RRULE:FREQ=YEARLY\r\n"
+        "END:VEVENT\r\n"
+        "END:VCALENDAR\r\n",
+        encoding="utf-8",
+    )
+    calendar = CalendarIndex(
+        [
+            {"date": "2025-11-07"},
+            {"from": "2025-07-07", "to": "2025-07-11"},
+            {"yearly": "01-01"},
+            {"ics": "holidays.ics"},
+            # Invalid entries are skipped
+            {"date": "2025-02-30"},
+            {"yearly": "13-01"},
+            {"from": "2025-08-01", "to": "soon"},
+            "2025-12-24",
+        ],
+        base_dir=str(tmp_path),
+    )
+    rules = ScheduleRules(calendar=calendar)
+
+    assert capsys.readouterr().out.count("skipping blocked date") == 4
+
+    assert decide(datetime.date(2025, 11, 7), rules) == BLOCK
+    assert decide(datetime.date(2025, 11, 6), rules) == RESTORE
+    assert decide_range(datetime.date(2025, 7, 7), 5, rules) == [BLOCK] * 5
+    assert decide(datetime.date(2025, 4, 21), rules) == BLOCK
+    assert decide(datetime.date(2025, 4, 22), rules) == RESTORE
+    assert decide(datetime.date(2031, 12, 25), rules) == BLOCK
+
+    # 104 weekend days, Jan 1, Apr 21, Dec 25, Nov 7 and 5 vacation days
+    assert decide_year(2025, rules).count(BLOCK) == 104 + 4 + 5
+
+
+def test_deck_rules(capsys):
+    """Test deck, glob and regex rules and their inheritance."""
+    rules = CompiledRules(
+        [
+            {"deck": "Languages", "blocked_weekdays": []},
+            {"deck": "Exams::*::Mock*", "blocked_weekdays": [0]},
+            {"regex": "(?P<subject>Med).*", "blocked_weekdays": [4, 5, 6]},
+            {"regex": "Bio(", "blocked_weekdays": []},
+            {"regex": "Chem.*", "blocked_weekdays": [3]},
+            {"preset": 7, "blocked_weekdays": [2]},
+        ],
+        default_weekdays=(5, 6),
+    )
+    resolved = rules.resolve_all([
+        "Languages::Spanish::Verbs",
+        "Exams::2025::Mock 1",
+        "Exams::2025::Final",
+        "Medical::Anatomy",
+        "Chemistry",
+        "Biology",
+    ])
+
+    assert "invalid regex" in capsys.readouterr().out
+    assert resolved["Languages::Spanish::Verbs"].source == "deck Languages"
+    assert resolved["Exams::2025::Mock 1"].blocked_weekdays == {0}
+    assert resolved["Exams::2025::Final"].source == "default"
+    assert resolved["Medical::Anatomy"].blocked_weekdays == {4, 5, 6}
+    assert resolved["Chemistry"].blocked_weekdays == {3}
+    assert resolved["Biology"].source == "default"
+    assert rules.preset_rule(7).blocked_weekdays == {2}
+
+
+def open_fake_collection(tmp_path, monkeypatch, date, **config) -> FakeCollection:
+    """Make the core work on a generated collection with the given config."""
+    monkeypatch.setattr(storage, "STATE_DIR", str(tmp_path / "state"))
+    col = FakeCollection(40, 4000, date, path=str(tmp_path / "collection.anki2"))
+    config = {**utils.DEFAULT_CONFIG, "log_actions": False, **config}
+    monkeypatch.setattr(utils, "mw", FakeMainWindow(col, config))
+    utils.invalidate_addon_config()
+    core.invalidate_check_plan()
+    return col
+
+
+def preset_limits(col: FakeCollection) -> dict:
+    """Get the new-card limit of every preset."""
+    return {config["id"]: config["new"]["perDay"] for config in col.decks.all_config()}
+
+
+def new_card_ids(col: FakeCollection, deck_id: int) -> list:
+    """Get the unburied new cards of a deck."""
+    return col.db.list(f"select id from cards where queue = 0 and did in ({deck_id})")
+
+
+def test_block_and_restore_presets(tmp_path, monkeypatch):
+    """Test a blocked weekend and the restore on Monday, with Anki's undo rules."""
+    col = open_fake_collection(tmp_path, monkeypatch, SATURDAY, limit_mode="preset")
+    original = preset_limits(col)
+
+    core.run_automatic_check()
+    assert set(preset_limits(col).values()) == {0}
+    # Deck overrides were merged into one undo entry after the preset writes
+    assert len(col.undo_steps) == 1
+
+    col.advance_to(MONDAY)
+    core.run_automatic_check()
+    assert preset_limits(col) == original
+
+
+def test_today_only_blocked_parent_with_open_subdeck(tmp_path, monkeypatch):
+    """Test that a blocked deck with an open subdeck loses its own new cards."""
+    col = open_fake_collection(
+        tmp_path,
+        monkeypatch,
+        SATURDAY,
+        limit_mode="today_only",
+        deck_rules=[{"deck": "Subject 0000::Topic 01", "blocked_weekdays": []}],
+    )
+    # "Subject 0000" and "Subject 0000::Topic 01"
+    parent, child = DECK_ID_BASE, DECK_ID_BASE + 1
+    child_cards = new_card_ids(col, child)
+
+    core.run_automatic_check()
+
+    assert "newLimitToday" not in col.decks.get(parent)
+    assert new_card_ids(col, parent) == []
+    assert new_card_ids(col, child) == child_cards
+
+
+def test_rollback_survives_next_check(tmp_path, monkeypatch):
+    """Test that a check keeps the limits a rollback put back."""
+    col = open_fake_collection(tmp_path, monkeypatch, SATURDAY, limit_mode="preset")
+    original = preset_limits(col)
+    core.run_automatic_check()
+    block_snapshot = storage.list_snapshots(col.path)[0]["id"]
+
+    col.advance_to(MONDAY)
+    core.run_automatic_check()
+
+    # The user lowers a preset, then rolls back to before the weekend
+    config = col.decks.get_config(CONFIG_ID_BASE + 1)
+    config["new"]["perDay"] = 7
+    col.decks.update_config(config)
+    core.track_limit_changes()
+    core.rollback_to_snapshot(block_snapshot)
+    assert preset_limits(col) == original
+
+    core.run_automatic_check()
+    assert preset_limits(col) == original
+
+
+def test_check_plan_tracks_changed_limits(tmp_path, monkeypatch):
+    """Test that a planned check keeps a limit the user changed during the weekend."""
+    col = open_fake_collection(tmp_path, monkeypatch, SATURDAY, limit_mode="preset")
+    core.run_automatic_check()
+
+    # Changed on another device, so no hook tracked it
+    config = col.decks.get_config(CONFIG_ID_BASE + 1)
+    config["new"]["perDay"] = 5
+    col.decks.update_config(config)
+    col.advance_to(MONDAY)
+
+    dry_run = core.get_check_plan(read_only=True)
+    assert "Config 'Preset 001': 5 → 11" not in dry_run.messages()
+    assert storage.get_original_limits(col.path)[f"config_{CONFIG_ID_BASE + 1}"] == 11
+
+    plan = core.get_check_plan()
+    assert plan.messages() == dry_run.messages()
+    core.run_automatic_check()
+    assert preset_limits(col)[CONFIG_ID_BASE + 1] == 5
+
+
 if __name__ == "__main__":
     test_weekend_logic()
@@ -9,36 +9,142 @@ Version: 1.0.0
 License: MIT
 """
 
-from aqt import gui_hooks, mw
+import sys
+import time
 
-from .core import run_automatic_check
-from .ui import create_menu
+_import_started = time.perf_counter()
+
+# Only set up the addon when loaded by Anki; importing the package from the
+# command-line tool or tests must not pull in aqt and Qt
+mw = getattr(sys.modules.get("aqt"), "mw", None)
+
+# Tools menu entry; its actions are only added the first time it opens
+_menu = None
+
+# Seconds spent importing the package at startup, and loading the rest of
+# the addon (ui, core...) on first use; reported with the check timings
+import_seconds = 0.0
+load_seconds = None
+
+
+def _load_ui():
+    """Import the ui module (and with it core) on first use."""
+    global load_seconds
+
+    if load_seconds is None:
+        start = time.perf_counter()
+        from . import ui
+        load_seconds = time.perf_counter() - start
+
+    from . import ui
+    return ui
 
 
 def on_profile_loaded() -> None:
     """
     Hook function called when a profile is loaded.
-    Runs the automatic weekend check.
+    Starts the automatic weekend check in the background.
     """
+    from .translations import invalidate_language
+
+    # The new profile may use another interface language
+    invalidate_language()
+
     try:
-        run_automatic_check()
+        _load_ui().run_check_in_background()
     except Exception as e:
         print(f"Weekend Blocker error: {e}")
         import traceback
         traceback.print_exc()
 
 
+def on_profile_closing() -> None:
+    """
+    Hook function called before a profile is closed.
+    Stops the day rollover timer.
+    """
+    # Nothing to stop if the addon was never used
+    if load_seconds is not None:
+        _load_ui().stop_rollover_check()
+
+
+def on_menu_about_to_show() -> None:
+    """
+    Add the actions to the Weekend Blocker menu the first time it opens.
+    The actions then stay in the menu and follow the addon's state.
+    """
+    _load_ui().build_menu(_menu)
+    _menu.aboutToShow.disconnect(on_menu_about_to_show)
+
+
+def on_config_updated(new_config: dict) -> None:
+    """
+    Drop the cached config when the user edits it in the add-on manager.
+
+    Args:
+        new_config: Configuration saved by the user
+    """
+    from .utils import invalidate_addon_config
+
+    invalidate_addon_config(new_config)
+
+    # "enabled" or "manual_pause" may have been edited by hand
+    if load_seconds is not None:
+        _load_ui().refresh_menu_state()
+
+
+def on_operation_did_execute(changes, handler) -> None:
+    """
+    Hook function called after an operation changed the collection.
+    Keeps the backup of the original limits up to date when the user
+    edits presets or decks.
+
+    Args:
+        changes: OpChanges describing what the operation changed
+        handler: Object that started the operation
+    """
+    if not (getattr(changes, "deck_config", False) or getattr(changes, "deck", False)):
+        return
+
+    from .core import track_limit_changes
+    from .utils import buffered_log
+
+    try:
+        with buffered_log():
+            track_limit_changes()
+    except Exception as e:
+        print(f"Weekend Blocker error: {e}")
+
+
 def initialize_addon() -> None:
     """
-    Initialize the addon by setting up menus and hooks.
+    Initialize the addon by setting up an empty menu and the hooks.
+    Everything else is imported when it is first needed, so the addon
+    adds next to nothing to Anki's startup time.
     """
-    # Create the menu in Tools
-    create_menu()
+    global _menu
+
+    from aqt import gui_hooks
+    from aqt.qt import QMenu
+
+    # Menu stub in Tools, filled in by ui.build_menu() when it first opens
+    _menu = QMenu("Weekend Blocker", mw)
+    _menu.aboutToShow.connect(on_menu_about_to_show)
+    mw.form.menuTools.addMenu(_menu)
 
     # Register hook for profile loading
     gui_hooks.profile_did_open.append(on_profile_loaded)
+    gui_hooks.profile_will_close.append(on_profile_closing)
+
+    # Track limits the user changes in the deck options
+    gui_hooks.operation_did_execute.append(on_operation_did_execute)
+
+    # Drop the cached config when the user edits it in the add-on manager
+    mw.addonManager.setConfigUpdatedAction(__name__, on_config_updated)
 
 
 # Initialize when the module is loaded
 if mw:
     initialize_addon()
+
+import_seconds = time.perf_counter() - _import_started
@@ -0,0 +1,184 @@
+"""
+Buffered, rotating action log for Weekend Blocker addon.
+Entries are kept in memory during an operation and written to
+actions.log (one JSON object per line) with a single write.
+"""
+
+import datetime
+import gzip
+import json
+import os
+import shutil
+from typing import Callable, ContextManager, List, Optional
+
+# Rotate when the live log grows past this size...
+MAX_LOG_BYTES = 1024 * 1024
+
+# ...or when its oldest entry is older than this many days
+MAX_LOG_AGE_DAYS = 30
+
+# Number of compressed segments (actions.log.1.gz, ...) to keep
+KEEP_SEGMENTS = 5
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class ActionLog:
+    """
+    Append-only JSON-lines log with buffering and rotation.
+
+    Outside a buffered block every entry is written immediately; inside
+    one (see begin()/end()) entries are collected and written together
+    when the outermost block ends. With a lock, every write and rotation
+    happens while holding it, so several processes can share the file.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = MAX_LOG_BYTES,
+        max_age_days: int = MAX_LOG_AGE_DAYS,
+        keep_segments: int = KEEP_SEGMENTS,
+        lock: Optional[Callable[[], ContextManager]] = None,
+    ) -> None:
+        self.path = path
+        self.lock = lock
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        self.keep_segments = keep_segments
+        self._buffer: List[str] = []
+        self._buffer_timestamp: Optional[str] = None
+        self._depth = 0
+        self._first_timestamp: Optional[str] = None
+        self._first_timestamp_known = False
+
+    def begin(self) -> None:
+        """Start (or nest) a buffered block."""
+        self._depth += 1
+
+    def end(self) -> None:
+        """End a buffered block, flushing when the outermost one ends."""
+        self._depth = max(self._depth - 1, 0)
+        if self._depth == 0:
+            self.flush()
+
+    @property
+    def buffering(self) -> bool:
+        """True while inside a buffered block."""
+        return self._depth > 0
+
+    def append(self, entry: dict) -> None:
+        """
+        Add an entry to the log.
+
+        Args:
+            entry: JSON-serializable entry; must contain a "timestamp"
+        """
+        self._buffer.append(json.dumps(entry, ensure_ascii=False) + "\n")
+
+        if self._buffer_timestamp is None:
+            self._buffer_timestamp = entry.get("timestamp")
+
+        if not self.buffering:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write all buffered entries with a single write call."""
+        if not self._buffer:
+            return
+
+        data = "".join(self._buffer).encode("utf-8")
+        buffer_timestamp = self._buffer_timestamp
+        self._buffer = []
+        self._buffer_timestamp = None
+
+        try:
+            if self.lock is None:
+                self._write(data, buffer_timestamp)
+            else:
+                with self.lock():
+                    # Another process may have rotated the log meanwhile
+                    self._first_timestamp_known = False
+                    self._write(data, buffer_timestamp)
+        except OSError as e:
+            print(f"Weekend Blocker: Failed to write log: {e}")
+
+    def _write(self, data: bytes, buffer_timestamp: Optional[str]) -> None:
+        """Append data to the live log, rotating it first if needed."""
+        if not self._first_timestamp_known:
+            self._load_first_timestamp()
+
+        self._rotate_if_needed(len(data))
+        with open(self.path, "ab") as f:
+            f.write(data)
+        if self._first_timestamp is None:
+            self._first_timestamp = buffer_timestamp
+
+    def segment_paths(self) -> List[str]:
+        """
+        Get the paths of the existing compressed segments, newest first.
+
+        Returns:
+            List of file paths
+        """
+        paths = []
+        for index in range(1, self.keep_segments + 1):
+            segment = f"{self.path}.{index}.gz"
+            if os.path.exists(segment):
+                paths.append(segment)
+        return paths
+
+    def _load_first_timestamp(self) -> None:
+        """Read the timestamp of the oldest entry in the live log."""
+        self._first_timestamp_known = True
+
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                first_line = f.readline()
+            self._first_timestamp = json.loads(first_line).get("timestamp")
+        except (OSError, ValueError, AttributeError):
+            self._first_timestamp = None
+
+    def _is_too_old(self) -> bool:
+        """Check whether the oldest entry in the live log exceeds the age limit."""
+        if not self._first_timestamp:
+            return False
+
+        try:
+            first = datetime.datetime.strptime(self._first_timestamp, TIMESTAMP_FORMAT)
+        except ValueError:
+            return False
+
+        return datetime.datetime.now() - first > datetime.timedelta(days=self.max_age_days)
+
+    def _rotate_if_needed(self, incoming_bytes: int) -> None:
+        """Compress the live log into a segment if it is too large or too old."""
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return
+
+        if size == 0:
+            return
+
+        if size + incoming_bytes <= self.max_bytes and not self._is_too_old():
+            return
+
+        # Shift existing segments: .1.gz -> .2.gz, ... dropping the oldest
+        oldest = f"{self.path}.{self.keep_segments}.gz"
+        if os.path.exists(oldest):
+            os.remove(oldest)
+
+        for index in range(self.keep_segments - 1, 0, -1):
+            segment = f"{self.path}.{index}.gz"
+            if os.path.exists(segment):
+                os.replace(segment, f"{self.path}.{index + 1}.gz")
+
+        with open(self.path, "rb") as source, gzip.open(f"{self.path}.1.gz", "wb") as target:
+            shutil.copyfileobj(source, target)
+
+        os.remove(self.path)
+
+        # The buffered entries will start the new live log
+        self._first_timestamp = None
+        self._first_timestamp_known = True
@@ -0,0 +1,152 @@
+"""
+Batch mode for Weekend Blocker addon.
+Runs the weekend check over many collection files in parallel, one
+collection per worker process (SQLite and the Anki backend are
+per-process), and merges the results into one report.
+"""
+
+import os
+import signal
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from .cli import process_collection
+from .utils import file_lock
+
+# Seconds allowed for one collection before it is abandoned
+DEFAULT_TIMEOUT = 300
+
+# Seconds to wait for another process to release a collection
+DEFAULT_LOCK_TIMEOUT = 30
+
+
+@contextmanager
+def collection_lock(path: str, timeout: float = DEFAULT_LOCK_TIMEOUT) -> Iterator[None]:
+    """
+    Hold an exclusive lock file next to a collection while working on it.
+
+    Args:
+        path: Path of the collection file
+        timeout: Seconds to wait for the lock
+
+    Raises:
+        TimeoutError: If the lock could not be taken in time
+    """
+    with file_lock(path + ".weekend_blocker.lock", timeout):
+        yield
+
+
+@contextmanager
+def time_limit(seconds: int) -> Iterator[None]:
+    """
+    Raise TimeoutError in the current process if the block runs too long.
+
+    Uses SIGALRM, so the limit only applies on platforms that have it;
+    elsewhere the block runs without a limit.
+
+    Args:
+        seconds: Time limit (0 = no limit)
+    """
+    if not seconds or not hasattr(signal, "SIGALRM"):
+        yield
+        return
+
+    def on_alarm(signum, frame):
+        raise TimeoutError(f"timed out after {seconds}s")
+
+    previous = signal.signal(signal.SIGALRM, on_alarm)
+    signal.alarm(seconds)
+    try:
+        yield
+    finally:
+        signal.alarm(0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _process_one(path: str, dry_run: bool, timeout: int, lock_timeout: float) -> dict:
+    """Worker: lock one collection and run the check on it."""
+    try:
+        with collection_lock(path, lock_timeout), time_limit(timeout):
+            return process_collection(path, dry_run=dry_run)
+    except TimeoutError as e:
+        return {"collection": path, "dry_run": dry_run, "changes": [], "ok": False, "error": str(e)}
+
+
+def build_report(results: List[dict]) -> dict:
+    """
+    Merge per-collection results into one report.
+
+    Args:
+        results: Values returned by process_collection()
+
+    Returns:
+        dict: Totals, all changes prefixed by their collection, and the
+            individual results
+    """
+    targets: Dict[str, int] = {}
+    changes = []
+
+    for result in results:
+        target = result.get("target") or "error"
+        targets[target] = targets.get(target, 0) + 1
+
+        for change in result.get("changes", []):
+            changes.append(f"{result['collection']}: {change}")
+
+    return {
+        "collections": len(results),
+        "ok": sum(1 for result in results if result.get("ok")),
+        "failed": [result["collection"] for result in results if not result.get("ok")],
+        "targets": targets,
+        "total_changes": len(changes),
+        "changes": changes,
+        "results": results,
+    }
+
+
+def run_batch(
+    paths: List[str],
+    jobs: Optional[int] = None,
+    dry_run: bool = False,
+    timeout: int = DEFAULT_TIMEOUT,
+    lock_timeout: float = DEFAULT_LOCK_TIMEOUT,
+) -> dict:
+    """
+    Run the weekend check on many collections with a process pool.
+
+    Args:
+        paths: Collection files to process
+        jobs: Number of worker processes (defaults to the number of CPUs)
+        dry_run: If True, only report the changes without applying them
+        timeout: Seconds allowed per collection (0 = no limit)
+        lock_timeout: Seconds to wait for a locked collection
+
+    Returns:
+        dict: Report built by build_report(), results in input order
+    """
+    paths = list(dict.fromkeys(paths))
+    results: Dict[str, dict] = {}
+    workers = max(1, min(jobs or os.cpu_count() or 1, len(paths)))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(_process_one, path, dry_run, timeout, lock_timeout): path
+            for path in paths
+        }
+
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                results[path] = future.result()
+            except Exception as e:
+                # The worker itself died (e.g. a crash in the backend)
+                results[path] = {
+                    "collection": path,
+                    "dry_run": dry_run,
+                    "changes": [],
+                    "ok": False,
+                    "error": f"worker failed: {e}",
+                }
+
+    return build_report([results[path] for path in paths])
@@ -0,0 +1,217 @@
+"""
+Calendar rules for Weekend Blocker addon.
+Pure Python: the "blocked_dates" config option (single dates, date
+ranges, yearly dates and .ics files) is compiled into one bitset per
+year, so checking whether a date is blocked is a single bit test.
+"""
+
+import datetime
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+USER_FILES_DIR = os.path.join(os.path.dirname(__file__), "user_files")
+
+# (config key, compiled index) of the last compile_calendar() call
+_cache: Optional[Tuple[str, "CalendarIndex"]] = None
+
+# A date range as (first day, last day), both included
+DateRange = Tuple[datetime.date, datetime.date]
+
+
+def _parse_date(value: str) -> datetime.date:
+    """Parse "YYYY-MM-DD" or the "YYYYMMDD" form used by .ics files."""
+    value = value.strip()
+    if "-" in value:
+        return datetime.date.fromisoformat(value)
+    return datetime.date(int(value[:4]), int(value[4:6]), int(value[6:8]))
+
+
+def _parse_month_day(value: str) -> Tuple[int, int]:
+    """Parse a yearly "MM-DD" date."""
+    month, day = value.split("-")
+    # Checked against a leap year, so "02-29" is accepted
+    date = datetime.date(2000, int(month), int(day))
+    return date.month, date.day
+
+
+def read_ics(path: str) -> Tuple[List[DateRange], List[Tuple[int, int]]]:
+    """
+    Read the all-day events of an iCalendar (.ics) file.
+
+    Only what holiday calendars use is supported: DTSTART/DTEND dates
+    (times are ignored) and yearly recurrence (RRULE:FREQ=YEARLY).
+
+    Args:
+        path: Path of the .ics file
+
+    Returns:
+        tuple: (date ranges, yearly (month, day) dates)
+    """
+    with open(path, encoding="utf-8-sig") as f:
+        # Long lines are folded by starting the continuation with a space
+        text = f.read().replace("\r\n", "\n").replace("\n ", "").replace("\n\t", "")
+
+    ranges = []
+    yearly = []
+    event: Optional[Dict[str, str]] = None
+
+    for line in text.split("\n"):
+        if line == "BEGIN:VEVENT":
+            event = {}
+        elif line == "END:VEVENT" and event is not None:
+            if "DTSTART" in event:
+                start = _parse_date(event["DTSTART"][:8])
+                # DTEND is exclusive; a missing one means a single day
+                end = _parse_date(event["DTEND"][:8]) if "DTEND" in event else None
+                last = end - datetime.timedelta(days=1) if end and end > start else start
+
+                if "FREQ=YEARLY" in event.get("RRULE", "") and last == start:
+                    yearly.append((start.month, start.day))
+                else:
+                    ranges.append((start, last))
+            event = None
+        elif event is not None and ":" in line:
+            name, _, value = line.partition(":")
+            # Drop parameters such as ";VALUE=DATE"
+            event[name.split(";")[0].upper()] = value
+
+    return ranges, yearly
+
+
+class CalendarIndex:
+    """
+    Blocked dates compiled into one bitset per year.
+
+    Each entry of the "blocked_dates" config option is one of:
+
+    - {"date": "2025-12-25"}: a single date
+    - {"from": "2025-12-22", "to": "2026-01-02"}: a range, both included
+    - {"yearly": "12-25"}: the same date every year
+    - {"ics": "holidays.ics"}: the events of an .ics file, relative to
+      the addon's user_files folder
+
+    Entries that cannot be parsed are skipped with a message. Years are
+    compiled the first time they are needed.
+    """
+
+    def __init__(self, entries: Iterable[dict], base_dir: str = USER_FILES_DIR) -> None:
+        self.ranges: List[DateRange] = []
+        self.yearly: List[Tuple[int, int]] = []
+        self._years: Dict[int, bytearray] = {}
+
+        for entry in entries:
+            try:
+                self._add_entry(entry, base_dir)
+            except (AttributeError, TypeError, ValueError) as e:
+                print(f"Weekend Blocker: skipping blocked date {entry!r}: {e}")
+
+    def _add_entry(self, entry: dict, base_dir: str) -> None:
+        """Parse one "blocked_dates" entry."""
+        if "date" in entry:
+            date = _parse_date(entry["date"])
+            self.ranges.append((date, date))
+        elif "from" in entry:
+            start = _parse_date(entry["from"])
+            self.ranges.append((start, _parse_date(entry.get("to", entry["from"]))))
+        elif "yearly" in entry:
+            self.yearly.append(_parse_month_day(entry["yearly"]))
+        elif "ics" in entry:
+            try:
+                ranges, yearly = read_ics(os.path.join(base_dir, entry["ics"]))
+            except (OSError, ValueError) as e:
+                print(f"Weekend Blocker: could not read {entry['ics']}: {e}")
+                return
+            self.ranges.extend(ranges)
+            self.yearly.extend(yearly)
+        else:
+            raise ValueError("expected a date, from/to, yearly or ics key")
+
+    def _compile_year(self, year: int) -> bytearray:
+        """Build the bitset of a year, bit 0 = January 1st."""
+        bits = bytearray(46)  # 366 days
+        first = datetime.date(year, 1, 1)
+        last = datetime.date(year, 12, 31)
+
+        def mark(date: datetime.date) -> None:
+            day = (date - first).days
+            bits[day >> 3] |= 1 << (day & 7)
+
+        for start, end in self.ranges:
+            day = max(start, first)
+            while day <= min(end, last):
+                mark(day)
+                day += datetime.timedelta(days=1)
+
+        for month, day in self.yearly:
+            try:
+                mark(datetime.date(year, month, day))
+            except ValueError:
+                # February 29th outside leap years
+                pass
+
+        return bits
+
+    def year_bits(self, year: int) -> bytearray:
+        """
+        Get the bitset of a year, compiling it if needed.
+
+        Args:
+            year: Calendar year
+
+        Returns:
+            bytearray: Bit n is set if day n of the year (0 = January 1st)
+                is blocked
+        """
+        bits = self._years.get(year)
+        if bits is None:
+            bits = self._years[year] = self._compile_year(year)
+        return bits
+
+    def is_blocked(self, date: datetime.date) -> bool:
+        """
+        Check if a date is blocked by the calendar.
+
+        Args:
+            date: Date to check
+
+        Returns:
+            bool: True if new cards are blocked on that date
+        """
+        day = date.timetuple().tm_yday - 1
+        return bool(self.year_bits(date.year)[day >> 3] & (1 << (day & 7)))
+
+
+def compile_calendar(config: dict) -> Optional[CalendarIndex]:
+    """
+    Compile the "blocked_dates" config option.
+
+    The result is cached and only recompiled when the option or one of
+    the .ics files it uses changes.
+
+    Args:
+        config: Addon configuration
+
+    Returns:
+        CalendarIndex, or None if no dates are configured
+    """
+    global _cache
+
+    entries = config.get("blocked_dates") or []
+    if not entries:
+        return None
+
+    mtimes = []
+    for entry in entries:
+        if isinstance(entry, dict) and "ics" in entry:
+            try:
+                mtimes.append(os.path.getmtime(os.path.join(USER_FILES_DIR, entry["ics"])))
+            except (OSError, TypeError):
+                mtimes.append(None)
+
+    key = json.dumps([entries, mtimes], sort_keys=True)
+
+    if _cache is None or _cache[0] != key:
+        _cache = (key, CalendarIndex(entries))
+
+    return _cache[1]
@@ -0,0 +1,166 @@
+"""
+Command-line entry point for Weekend Blocker addon.
+Runs the weekend check against collection files without the Anki GUI,
+e.g. from cron:
+
+    python -m weekend_blocker.cli [--dry-run] collection.anki2 [...]
+
+A profile folder (e.g. ~/.local/share/Anki2/User 1) can be given
+instead of its collection.anki2.
+
+Prints one JSON result per collection and exits with status 1 if any
+collection failed. With --jobs, collections are processed in parallel
+and a consolidated report is printed instead.
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import List, Optional
+
+from .core import get_check_plan, run_automatic_check
+from .perf import get_last_timings
+from .utils import batched_config_writes, buffered_log, get_addon_config, using_collection
+
+# File name of the collection inside an Anki profile folder
+COLLECTION_FILE = "collection.anki2"
+
+
+def collection_path(path: str) -> str:
+    """
+    Get the collection file a command-line argument names.
+
+    Args:
+        path: Path of a .anki2 collection or of a profile folder
+
+    Returns:
+        str: Path of the collection file (the argument if it is not a folder)
+    """
+    if os.path.isdir(path):
+        return os.path.join(path, COLLECTION_FILE)
+    return path
+
+
+def process_collection(path: str, dry_run: bool = False) -> dict:
+    """
+    Run the weekend check on one collection file.
+
+    Args:
+        path: Path of the .anki2 collection or of its profile folder
+        dry_run: If True, only report the changes without applying them
+
+    Returns:
+        dict: JSON-serializable result
+    """
+    result = {
+        "collection": path,
+        "dry_run": dry_run,
+        "target": None,
+        "today_only": None,
+        "changes": [],
+        "plan": [],
+        "message": None,
+        "timings": None,
+        "ok": False,
+        "error": None,
+    }
+
+    path = collection_path(path)
+    result["collection"] = path
+
+    # Collection() would create a new, empty collection
+    if not os.path.isfile(path):
+        result["error"] = f"Collection not found: {path}"
+        return result
+
+    try:
+        from anki.collection import Collection
+        col = Collection(path)
+    except Exception as e:
+        result["error"] = f"Failed to open collection: {e}"
+        return result
+
+    try:
+        with using_collection(col), batched_config_writes(), buffered_log():
+            if not get_addon_config().get("enabled", True):
+                result["target"] = "disabled"
+            else:
+                # The check reuses this plan instead of scanning again
+                plan = get_check_plan(read_only=dry_run)
+
+                result["target"] = plan.target
+                result["today_only"] = plan.today_only
+                result["changes"] = plan.messages()
+                result["plan"] = plan.records()
+
+                if not dry_run:
+                    result["message"] = run_automatic_check(show_feedback=True)
+                    result["timings"] = get_last_timings()
+
+        result["ok"] = True
+    except Exception as e:
+        result["error"] = str(e)
+    finally:
+        col.close()
+
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Parse the command line and process every collection given.
+
+    Args:
+        argv: Arguments (defaults to sys.argv[1:])
+
+    Returns:
+        int: Exit status (0 if all collections succeeded)
+    """
+    parser = argparse.ArgumentParser(
+        prog="weekend_blocker",
+        description="Apply Weekend Blocker to Anki collection files.",
+    )
+    parser.add_argument(
+        "collections",
+        nargs="+",
+        help="paths of .anki2 collection files or of the profile folders holding them",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="only report the changes, don't modify the collections",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=0,
+        help="process collections in parallel with this many worker processes",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=int,
+        default=300,
+        help="seconds allowed per collection in parallel mode (default: 300)",
+    )
+    args = parser.parse_args(argv)
+    paths = [collection_path(path) for path in args.collections]
+
+    if args.jobs > 0:
+        from .batch import run_batch
+
+        report = run_batch(paths, jobs=args.jobs, dry_run=args.dry_run, timeout=args.timeout)
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+        return 0 if not report["failed"] else 1
+
+    results = [process_collection(path, dry_run=args.dry_run) for path in paths]
+
+    json.dump(results, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+    return 0 if all(result["ok"] for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
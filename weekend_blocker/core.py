@@ -3,22 +3,86 @@ Core logic for Weekend Blocker addon.
 Manages deck configurations and automatic weekend blocking.
 """
 
-from typing import Dict, List
-
-from aqt import mw
-from aqt.deckconf import DeckConf
-
+import datetime
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+
+from . import perf
+from .calendar_index import compile_calendar
+from .plan import CONFIG, DECK, TODAY, CheckPlan, LimitChange
+from .rules import compile_rules
+from .schedule import ScheduleRules, decide
+from .status import LimitRow, StatusModel
+from .storage import (
+    LimitsReadError,
+    add_snapshot,
+    get_applied_limits,
+    get_buried_ids,
+    get_fingerprint,
+    get_limits_watermark,
+    get_original_limits as get_stored_limits,
+    get_snapshot_limits,
+    set_applied_limits,
+    set_buried_ids,
+    set_fingerprint,
+    set_limits_watermark,
+    set_original_limits,
+    update_original_limits,
+    USER_FILES_DIR,
+)
 from .translations import get_translation as tr
 from .utils import (
+    batched_config_writes,
+    buffered_log,
     get_addon_config,
+    get_collection,
     get_day_name,
+    get_today,
     is_weekend,
     log_action,
     save_addon_config,
-    show_tooltip,
+    using_collection,
 )
 
 
+# (key, plan) of the last plan built by build_check_plan()
+_plan_cache: Optional[Tuple[str, CheckPlan]] = None
+
+# (key, model) of the last model built by get_status_model()
+_status_cache: Optional[Tuple[str, StatusModel]] = None
+
+# State of the run_as_op() call running on each thread: "changes" holds the
+# OpChanges returned by its writes (unset outside run_as_op()), so a write
+# made on the main thread never ends up in a background operation
+_op_state = threading.local()
+
+
+class OpResult(NamedTuple):
+    """Result of run_as_op(), as expected by aqt's CollectionOp."""
+
+    message: Optional[str]
+    # Merged OpChanges of every write, so the UI updates what changed
+    changes: Any
+
+
+class BlockSelection(NamedTuple):
+    """Decks and presets to block today, as resolved from the deck rules."""
+
+    blocked_decks: FrozenSet[int]
+    open_decks: FrozenSet[int]
+    blocked_presets: FrozenSet[int]
+    open_presets: FrozenSet[int]
+    # Decks whose whole subtree is blocked, for today-only limits
+    today_only_roots: FrozenSet[int]
+    # Blocked decks using an open preset, whose limit stays open
+    shared_preset_decks: FrozenSet[int] = frozenset()
+    # Blocked decks with an open subdeck, which a today-only limit would cap
+    partial_decks: FrozenSet[int] = frozenset()
+
+
 def get_all_deck_configs() -> Dict[int, dict]:
     """
     Get all deck configurations with their new cards per day settings.
@@ -26,11 +90,12 @@ def get_all_deck_configs() -> Dict[int, dict]:
     Returns:
         dict: Dictionary mapping config_id to config data
     """
-    if not mw or not mw.col:
+    col = get_collection()
+    if not col:
         return {}
 
     configs = {}
-    all_config = mw.col.decks.all_config()
+    all_config = col.decks.all_config()
 
     for config in all_config:
         config_id = config["id"]
@@ -39,375 +104,1775 @@ def get_all_deck_configs() -> Dict[int, dict]:
         configs[config_id] = {
             "name": config.get("name", f"Config {config_id}"),
             "new_per_day": new_cards_per_day,
-            "full_config": config
         }
 
     return configs
 
 
-def save_original_limits() -> None:
+def write_limits(
+    configs: List[dict],
+    decks: List[dict],
+    label: str,
+    previous: Optional[Dict[str, int]] = None,
+) -> int:
     """
-    Save the original 'new cards per day' limits for all deck configs and individual decks.
-    This is done only once, on first run, to preserve user settings.
+    Write changed deck configs and decks back to the collection in one batch.
+
+    Deck writes are grouped under a single undo entry, so they appear (and
+    can be undone) as one step. Presets can only be written with the
+    legacy API, which is not undoable and clears Anki's undo queue, so
+    they are written first, outside the undo entry. Callers pass only the
+    rows that actually changed, so a no-op run performs no writes at all.
+
+    Args:
+        configs: Modified deck configuration dicts
+        decks: Modified deck dicts
+        label: Name of the undo entry
+        previous: Limits before the change, keyed "config_<id>" /
+            "deck_<id>"; if given, they are kept as a snapshot for
+            rollback_to_snapshot()
+
+    Returns:
+        int: Number of rows written
     """
-    config = get_addon_config()
+    if not configs and not decks:
+        return 0
 
-    # Only save if we don't have original limits yet
-    if config.get("original_limits"):
-        return
+    col = get_collection()
+    if not col:
+        return 0
 
-    original_limits = {}
+    with perf.phase("snapshot"):
+        if previous:
+            add_snapshot(
+                col.path, datetime.datetime.now().isoformat(timespec="seconds"), label, previous
+            )
 
-    # Save deck config limits
-    deck_configs = get_all_deck_configs()
-    for config_id, deck_config in deck_configs.items():
-        original_limits[f"config_{config_id}"] = deck_config["new_per_day"]
+    with perf.phase("write"):
+        for config in configs:
+            col.decks.update_config(config)
 
-    # Save individual deck limits (if they have overrides)
-    if mw and mw.col:
-        all_decks = mw.col.decks.all()
-        for deck in all_decks:
-            deck_id = deck.get("id")
-            deck_name = deck.get("name", "Unknown")
+        if configs:
+            _record_config_changes()
 
-            # Save deck-specific limit if it exists
-            if "new" in deck and "perDay" in deck["new"]:
-                original_limits[f"deck_{deck_id}"] = deck["new"]["perDay"]
+        if decks:
+            undo_step = col.add_custom_undo_entry(label)
 
-    config["original_limits"] = original_limits
-    save_addon_config(config)
+            for deck in decks:
+                col.decks.update_dict(deck)
 
-    log_action(
-        "Saved original limits",
-        {"original_limits": original_limits}
-    )
+            _record_op_changes(col.merge_undo_entries(undo_step))
+
+    perf.count("presets_written", len(configs))
+    perf.count("decks_written", len(decks))
+
+    return len(configs) + len(decks)
 
 
-def set_new_cards_limit(limit: int, dry_run: bool = False) -> List[str]:
+def _record_op_changes(result: Any) -> None:
+    """Keep the OpChanges of a backend write for run_as_op()."""
+    op_changes = getattr(_op_state, "changes", None)
+    if op_changes is not None and result is not None:
+        # OpChangesWithCount and similar wrap the changes
+        op_changes.append(getattr(result, "changes", result))
+
+
+def _record_config_changes() -> None:
+    """Record for run_as_op() that presets changed (legacy writes return no OpChanges)."""
+    op_changes = getattr(_op_state, "changes", None)
+    if op_changes is not None:
+        from anki.collection import OpChanges
+
+        op_changes.append(OpChanges(deck_config=True, study_queues=True))
+
+
+def run_as_op(operation: Callable[[], Optional[str]], col: Any = None) -> OpResult:
     """
-    Set the new cards per day limit for all deck configurations AND individual decks.
+    Run a core operation and collect the OpChanges of all its writes.
+
+    Used as the body of a CollectionOp, so Anki refreshes the screens
+    affected by the writes (e.g. the deck list after limits change). The
+    changes and the collection are kept per thread, so main-thread code
+    running meanwhile does not mix with the operation.
 
     Args:
-        limit: The new limit to set (0 to block new cards)
-        dry_run: If True, only simulate the changes without applying
+        operation: Function returning a message, e.g. run_automatic_check
+        col: Collection the CollectionOp passed in (default: get_collection())
 
     Returns:
-        List of messages describing what was changed
+        OpResult with the message and the merged changes
     """
-    if not mw or not mw.col:
-        return ["Error: Anki collection not available"]
+    from anki.collection import OpChanges
 
-    changes = []
+    if col is None:
+        col = get_collection()
 
-    # Method 1: Update all deck configurations (affects decks using these configs)
-    all_config = mw.col.decks.all_config()
+    previous = getattr(_op_state, "changes", None)
+    _op_state.changes = collected = []
+    try:
+        with using_collection(col):
+            message = operation()
+    finally:
+        _op_state.changes = previous
 
-    for config in all_config:
-        config_id = config["id"]
-        config_name = config.get("name", f"Config {config_id}")
-        current_limit = config.get("new", {}).get("perDay", 20)
+    changes = OpChanges()
+    for op_changes in collected:
+        # Flags are booleans, so merging ORs them
+        changes.MergeFrom(op_changes)
 
-        if current_limit != limit:
-            if not dry_run:
-                # Update the configuration
-                config["new"]["perDay"] = limit
-                mw.col.decks.update_config(config)
+    return OpResult(message, changes)
 
-            changes.append(
-                f"Config '{config_name}': {current_limit} → {limit}"
-            )
 
-    # Method 2: Update all individual decks (some decks may have per-deck overrides)
-    all_decks = mw.col.decks.all()
+def get_collection_fingerprint(target: str) -> str:
+    """
+    Build a cheap fingerprint of the state relevant to the weekend check.
 
-    for deck in all_decks:
-        deck_name = deck.get("name", "Unknown")
+    It combines the target mode, the scheduler day and the count and latest
+    modification time of the deck configs and decks, all read with aggregate
+    queries, so it costs a few backend calls no matter how many decks exist.
 
-        # Skip the default deck if it's causing issues
-        if deck_name == "Default" or deck.get("id") == 1:
-            continue
+    Args:
+        target: Target mode of the check, e.g. "block:today_only"
 
-        # Check if this deck has a new cards limit override
-        if "new" in deck and "perDay" in deck["new"]:
-            current_deck_limit = deck["new"]["perDay"]
+    Returns:
+        str: Fingerprint string
+    """
+    col = get_collection()
+    if not col:
+        return ""
+
+    db = col.db
+    config_count, config_mtime = db.first("select count(), max(mtime_secs) from deck_config")
+    deck_count, deck_mtime = db.first("select count(), max(mtime_secs) from decks")
 
-            if current_deck_limit != limit:
-                if not dry_run:
-                    deck["new"]["perDay"] = limit
-                    mw.col.decks.save(deck)
+    return (
+        f"{target}|{col.sched.today}|"
+        f"{config_count}:{config_mtime}|{deck_count}:{deck_mtime}"
+    )
 
-                changes.append(
-                    f"Deck '{deck_name}': {current_deck_limit} → {limit}"
-                )
 
-    if not dry_run and changes:
-        mw.col.decks.flush()
-        log_action(
-            f"Set new cards limit to {limit}",
-            {"changes": changes}
-        )
+def uses_today_only_limits() -> bool:
+    """
+    Check whether weekends should be blocked with "today only" deck limits.
 
-    return changes
+    The "limit_mode" config option selects the method: "today_only",
+    "preset" or "auto" (the default). In "auto" mode, today-only limits
+    are used when Anki supports them (2.1.55+ with the v3 scheduler).
+
+    Returns:
+        bool: True to use today-only limits, False to rewrite presets
+    """
+    col = get_collection()
+    if not col:
+        return False
+
+    mode = get_addon_config().get("limit_mode", "auto")
+
+    if mode == "preset":
+        return False
+
+    from anki.utils import point_version
 
+    supported = point_version() >= 55 and col.v3_scheduler()
 
-def bury_new_cards_in_queue() -> int:
+    if mode == "today_only" and not supported:
+        print("Weekend Blocker: today-only limits not supported, rewriting presets")
+
+    return supported
+
+
+def get_original_limits(read_only: bool = False) -> Dict[str, int]:
     """
-    Bury all new cards that are currently in today's queue.
-    This ensures that cards already scheduled for today won't appear.
+    Get the backup of the original new-card limits of the current collection.
+
+    Backups used to live in the addon config ("original_limits"); such a
+    backup is moved to the collection's sidecar state the first time it
+    is needed.
+
+    Args:
+        read_only: Read an old backup where it is instead of moving it,
+            so nothing is written (for dry runs)
 
     Returns:
-        int: Number of cards buried
+        dict: Limits keyed "config_<id>" / "deck_<id>" (empty if none)
+
+    Raises:
+        LimitsReadError: If the stored backup could not be read
     """
-    if not mw or not mw.col:
-        return 0
+    col = get_collection()
+    if not col:
+        return {}
 
-    # Find all new cards (queue type 0 = new)
-    new_card_ids = mw.col.find_cards("is:new -is:suspended")
+    limits = get_stored_limits(col.path, read_only)
+    if limits is not None:
+        return limits
 
-    if not new_card_ids:
-        return 0
+    config = get_addon_config()
+    if read_only:
+        return dict(config.get("original_limits") or {})
 
-    # Bury these cards for today (they'll come back tomorrow if unburied)
-    mw.col.sched.bury_cards(new_card_ids, manual=False)
+    limits = config.pop("original_limits", None) or {}
+    set_original_limits(col.path, limits)
 
-    log_action(
-        f"Buried {len(new_card_ids)} new cards",
-        {"count": len(new_card_ids)}
-    )
+    if limits:
+        save_addon_config(config)
 
-    return len(new_card_ids)
+    return limits
 
 
-def apply_weekend_block() -> None:
+def get_limits_mtime() -> int:
     """
-    Apply weekend blocking: set new cards per day to 0 and bury cards already in queue.
+    Get the latest modification time of any deck config or deck.
+
+    Returns:
+        int: Modification time in seconds (0 if unknown)
     """
-    # First, bury any new cards already in today's queue
-    buried_count = bury_new_cards_in_queue()
+    col = get_collection()
+    if not col:
+        return 0
 
-    # Then set the limit to 0 to prevent more cards from appearing
-    changes = set_new_cards_limit(0)
+    return col.db.scalar(
+        "select max(m) from (select max(mtime_secs) m from deck_config "
+        "union all select max(mtime_secs) m from decks)"
+    ) or 0
 
-    if changes or buried_count > 0:
-        message = f"{tr('weekend_blocked_title')}\n\n"
-        message += f"{tr('status_today')}: {get_day_name()}\n\n"
 
-        if buried_count > 0:
-            message += f"{tr('weekend_buried')}: {buried_count}\n"
+def _record_applied_limits(written: Dict[str, int], restored: Iterable[str] = ()) -> None:
+    """Remember the limits the addon wrote, so tracking can ignore them."""
+    col = get_collection()
+    applied = get_applied_limits(col.path)
+    applied.update(written)
 
-        if changes:
-            message += f"{tr('weekend_changes')}:\n" + "\n".join(changes)
+    for key in restored:
+        applied.pop(key, None)
 
-        show_tooltip(message, duration=5000)
-    else:
-        show_tooltip(f"{tr('tooltip_already_blocked')} ({get_day_name()})")
+    set_applied_limits(col.path, applied)
 
 
-def unbury_new_cards() -> int:
+def track_limit_changes(
+    original_limits: Optional[Dict[str, int]] = None, read_only: bool = False
+) -> int:
     """
-    Unbury all new cards that were buried by the addon.
+    Update the backup with the limits the user changed since the last call.
+
+    Only the presets and decks modified after the stored watermark are
+    read, so the cost grows with the number of changes rather than with
+    the collection. Values the addon wrote itself (such as the 0 of a
+    blocked weekend) are skipped.
+
+    Args:
+        original_limits: Backup already read by the caller, updated in
+            place (default: read it from storage)
+        read_only: Only update original_limits, writing nothing (for dry
+            runs)
 
     Returns:
-        int: Number of cards unburied
+        int: Number of backup entries updated
     """
-    if not mw or not mw.col:
+    col = get_collection()
+    if not col:
+        return 0
+
+    if original_limits is None:
+        original_limits = get_stored_limits(col.path)
+    if not original_limits:
         return 0
 
-    # Find all buried new cards
-    buried_new_cards = mw.col.find_cards("is:new is:buried")
+    watermark = get_limits_watermark(col.path)
+    latest = get_limits_mtime()
 
-    if not buried_new_cards:
+    # Backups made by earlier versions start being tracked from now on
+    if watermark is None or latest <= watermark:
+        if watermark is None and not read_only:
+            set_limits_watermark(col.path, latest)
         return 0
 
-    # Unbury these cards
-    mw.col.sched.unbury_cards(buried_new_cards)
+    applied = get_applied_limits(col.path)
+    updated = {}
+
+    def track(key: str, value: Optional[int]) -> None:
+        if value is None or applied.get(key) == value or original_limits.get(key) == value:
+            return
+        updated[key] = value
+
+    for config_id in col.db.list("select id from deck_config where mtime_secs > ?", watermark):
+        config = col.decks.get_config(config_id)
+        if config:
+            track(f"config_{config_id}", config.get("new", {}).get("perDay"))
+
+    for deck_id in col.db.list("select id from decks where mtime_secs > ?", watermark):
+        deck = col.decks.get(deck_id, default=False)
+        if deck and "new" in deck:
+            track(f"deck_{deck_id}", deck["new"].get("perDay"))
+
+    if read_only:
+        original_limits.update(updated)
+        return len(updated)
+
+    set_limits_watermark(col.path, latest)
+
+    if updated:
+        update_original_limits(col.path, updated)
+        original_limits.update(updated)
+        invalidate_check_plan()
+
+        # What the user set is no longer the value the addon applied
+        _record_applied_limits({}, list(updated))
+
+        log_action(
+            f"Updated {len(updated)} original limits",
+            {"changes": updated},
+            event="backup"
+        )
+
+    return len(updated)
+
+
+def save_original_limits(original_limits: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+    """
+    Save the original 'new cards per day' limits for all deck configs and individual decks.
+    The full snapshot is taken only once, on first run, to preserve user settings;
+    after that, limits the user changes are picked up by track_limit_changes().
+
+    Args:
+        original_limits: Value of get_original_limits() already read by
+            the caller (default: read it)
+
+    Returns:
+        dict: The backup, as it is stored after this call
+
+    Raises:
+        LimitsReadError: If the stored backup could not be read
+    """
+    col = get_collection()
+    if not col:
+        return {}
+
+    if original_limits is None:
+        original_limits = get_original_limits()
+
+    # Only save if we don't have original limits yet
+    if original_limits:
+        track_limit_changes(original_limits)
+        return original_limits
+
+    original_limits = {}
+
+    # Save deck config limits
+    deck_configs = get_all_deck_configs()
+    for config_id, deck_config in deck_configs.items():
+        original_limits[f"config_{config_id}"] = deck_config["new_per_day"]
+
+    # Save individual deck limits (if they have overrides)
+    for deck in col.decks.all():
+        deck_id = deck.get("id")
+
+        # Save deck-specific limit if it exists
+        if "new" in deck and "perDay" in deck["new"]:
+            original_limits[f"deck_{deck_id}"] = deck["new"]["perDay"]
+
+    set_original_limits(col.path, original_limits)
+    set_applied_limits(col.path, {})
+    invalidate_check_plan()
+    set_limits_watermark(col.path, get_limits_mtime())
 
     log_action(
-        f"Unburied {len(buried_new_cards)} new cards",
-        {"count": len(buried_new_cards)}
+        "Saved original limits",
+        {"original_limits": original_limits},
+        event="backup"
     )
 
-    return len(buried_new_cards)
+    return original_limits
 
 
-def restore_weekday_limits() -> None:
+def get_block_selection(date: Optional[datetime.date] = None) -> Optional[BlockSelection]:
     """
-    Restore original new cards per day limits for weekdays and unbury cards.
+    Resolve the "deck_rules" config option against the collection's decks.
+
+    A deck follows its own deck/regex rule or the one inherited from its
+    parent deck; otherwise the rule of its preset, if any; otherwise the
+    global blocked weekdays. A preset is blocked by its own rule, or when
+    every deck using it is blocked. Dates blocked by the calendar
+    ("blocked_dates") block every deck.
+
+    Args:
+        date: Date to resolve for (defaults to today)
+
+    Returns:
+        BlockSelection, or None if no deck rules are configured or the
+            calendar blocks the whole collection
     """
     config = get_addon_config()
-    original_limits = config.get("original_limits", {})
+    rules = compile_rules(config)
+    col = get_collection()
+    if rules is None or not col:
+        return None
+
+    date = date or get_today()
+    calendar = compile_calendar(config)
+    if calendar is not None and calendar.is_blocked(date):
+        return None
+    decks = [deck for deck in col.decks.all() if not deck.get("dyn")]
+    resolved = rules.resolve_all(deck["name"] for deck in decks)
+
+    blocked_decks = set()
+    open_decks = set()
+    preset_decks: Dict[int, List[bool]] = {}
+    partial = set()  # names of decks with an open deck below them
+
+    for deck in decks:
+        config_id = deck.get("conf", 1)
+        rule = resolved[deck["name"]]
+
+        if rule.source == "default":
+            rule = rules.preset_rule(config_id) or rule
+
+        blocked = rule.blocks(date)
+        (blocked_decks if blocked else open_decks).add(deck["id"])
+        preset_decks.setdefault(config_id, []).append(blocked)
+
+        if not blocked:
+            name = deck["name"]
+            while "::" in name:
+                name = name.rpartition("::")[0]
+                if name in partial:
+                    break
+                partial.add(name)
+
+    blocked_presets = set()
+    open_presets = set()
+
+    for config in col.decks.all_config():
+        config_id = config["id"]
+        rule = rules.preset_rule(config_id)
+
+        if rule is not None:
+            blocked = rule.blocks(date)
+        elif config_id in preset_decks:
+            blocked = all(preset_decks[config_id])
+        else:
+            blocked = rules.default.blocks(date)
+
+        (blocked_presets if blocked else open_presets).add(config_id)
+
+    # A today-only limit also caps the subdecks, so it can only go on the
+    # top of a subtree that is blocked as a whole
+    fully_blocked = {
+        deck["name"] for deck in decks
+        if deck["id"] in blocked_decks and deck["name"] not in partial
+    }
+    roots = {
+        deck["id"] for deck in decks
+        if deck["name"] in fully_blocked
+        and deck["name"].rpartition("::")[0] not in fully_blocked
+    }
+
+    shared = {
+        deck["id"] for deck in decks
+        if deck["id"] in blocked_decks and deck.get("conf", 1) in open_presets
+    }
+    partial_decks = {
+        deck["id"] for deck in decks
+        if deck["id"] in blocked_decks and deck["name"] in partial
+    }
+
+    return BlockSelection(
+        frozenset(blocked_decks),
+        frozenset(open_decks),
+        frozenset(blocked_presets),
+        frozenset(open_presets),
+        frozenset(roots),
+        frozenset(shared),
+        frozenset(partial_decks),
+    )
 
-    if not original_limits:
-        show_tooltip(tr("tooltip_no_backup"))
-        return
 
-    if not mw or not mw.col:
-        return
+def plan_new_cards_limit(
+    limit: int,
+    config_ids: Optional[FrozenSet[int]] = None,
+    deck_ids: Optional[FrozenSet[int]] = None,
+) -> List[LimitChange]:
+    """
+    Plan setting the new cards per day limit of deck configurations and decks.
+
+    Args:
+        limit: The new limit to set (0 to block new cards)
+        config_ids: Only change these presets (default: all)
+        deck_ids: Only change these decks (default: all)
 
-    # First, unbury any cards that were buried
-    unburied_count = unbury_new_cards()
+    Returns:
+        List of changes, without applying them
+    """
+    col = get_collection()
+    if not col:
+        return []
 
     changes = []
 
-    # Restore deck config limits
-    all_config = mw.col.decks.all_config()
+    # Method 1: Update all deck configurations (affects decks using these configs)
+    with perf.phase("presets"):
+        all_config = col.decks.all_config()
+        perf.count("presets_scanned", len(all_config))
 
-    for deck_config in all_config:
-        config_id = deck_config["id"]
-        config_key = f"config_{config_id}"
-        config_name = deck_config.get("name", f"Config {config_id}")
+        for config in all_config:
+            config_id = config["id"]
+            current_limit = config.get("new", {}).get("perDay", 20)
 
-        if config_key in original_limits:
-            original_limit = original_limits[config_key]
-            current_limit = deck_config.get("new", {}).get("perDay", 0)
+            if config_ids is not None and config_id not in config_ids:
+                continue
 
-            if current_limit != original_limit:
-                deck_config["new"]["perDay"] = original_limit
-                mw.col.decks.update_config(deck_config)
-                changes.append(f"Config '{config_name}': {current_limit} → {original_limit}")
+            if current_limit != limit:
+                config_name = config.get("name", f"Config {config_id}")
+                changes.append(LimitChange(
+                    CONFIG, config_id, config_name, current_limit, limit, source=config
+                ))
 
-    # Restore individual deck limits
-    all_decks = mw.col.decks.all()
+    # Method 2: Update all individual decks (some decks may have per-deck overrides)
+    with perf.phase("decks"):
+        all_decks = col.decks.all()
+        perf.count("decks_scanned", len(all_decks))
 
-    for deck in all_decks:
-        deck_id = deck.get("id")
-        deck_key = f"deck_{deck_id}"
-        deck_name = deck.get("name", "Unknown")
+        for deck in all_decks:
+            deck_name = deck.get("name", "Unknown")
 
-        if deck_key in original_limits:
-            original_limit = original_limits[deck_key]
+            # Skip the default deck if it's causing issues
+            if deck_name == "Default" or deck.get("id") == 1:
+                continue
 
-            # Only restore if the deck has the override
-            if "new" in deck and "perDay" in deck["new"]:
-                current_limit = deck["new"]["perDay"]
+            if deck_ids is not None and deck.get("id") not in deck_ids:
+                continue
 
-                if current_limit != original_limit:
-                    deck["new"]["perDay"] = original_limit
-                    mw.col.decks.save(deck)
-                    changes.append(f"Deck '{deck_name}': {current_limit} → {original_limit}")
+            # Check if this deck has a new cards limit override
+            if "new" in deck and "perDay" in deck["new"]:
+                current_deck_limit = deck["new"]["perDay"]
 
-    if changes or unburied_count > 0:
-        mw.col.decks.flush()
-        log_action(
-            "Restored weekday limits",
-            {"changes": changes, "unburied": unburied_count}
-        )
+                if current_deck_limit != limit:
+                    changes.append(LimitChange(
+                        DECK, deck["id"], deck_name, current_deck_limit, limit, source=deck
+                    ))
 
-        message = f"{tr('weekday_restored_title')}\n\n"
-        message += f"{tr('status_today')}: {get_day_name()}\n\n"
+    return changes
 
-        if unburied_count > 0:
-            message += f"{tr('weekday_unburied')}: {unburied_count}\n"
 
-        if changes:
-            message += f"{tr('weekday_restored')}:\n" + "\n".join(changes)
+def apply_limit_changes(changes: List[LimitChange], label: str, action: str, event: str) -> int:
+    """
+    Apply planned limit changes in one batch.
 
-        show_tooltip(message, duration=5000)
-    else:
-        show_tooltip(f"{tr('tooltip_already_correct')} ({get_day_name()})")
+    The presets and decks the plan was built from are written back, so
+    nothing is read again; only changes planned without them are loaded.
 
+    Args:
+        changes: Changes from one of the plan_* functions
+        label: Name of the undo entry
+        action: Description for the action log
+        event: Event type for the action log
 
-def pause_all_new_cards() -> None:
-    """
-    Manually pause all new cards (useful for vacations).
+    Returns:
+        int: Number of rows written
     """
-    config = get_addon_config()
-    config["manual_pause"] = True
-    save_addon_config(config)
+    col = get_collection()
+    if not col or not changes:
+        return 0
 
-    changes = set_new_cards_limit(0)
+    configs: Dict[int, dict] = {}
+    decks: Dict[int, dict] = {}
+    previous = {}
+    applied = {}
+    restored = []
+
+    for change in changes:
+        if change.kind == CONFIG:
+            config = configs.get(change.id) or change.source or col.decks.get_config(change.id)
+            if not config:
+                continue
+            config["new"]["perDay"] = change.new
+            configs[change.id] = config
+        else:
+            deck = decks.get(change.id) or change.source or col.decks.get(change.id, default=False)
+            if not deck:
+                continue
+            if change.kind == TODAY:
+                deck["newLimitToday"] = {"limit": change.new, "today": col.sched.today}
+            else:
+                deck["new"]["perDay"] = change.new
+            decks[change.id] = deck
+
+        # Today-only limits expire by themselves: no snapshot or tracking
+        if change.kind != TODAY:
+            previous[change.key] = change.old
+            if change.restore:
+                restored.append(change.key)
+            else:
+                applied[change.key] = change.new
+
+    written = write_limits(list(configs.values()), list(decks.values()), label, previous)
+
+    if previous:
+        _record_applied_limits(applied, restored)
 
-    message = "⏸️ MODO MANUAL: Novos cards pausados\n\n"
-    if changes:
-        message += "Alterações:\n" + "\n".join(changes)
-    else:
-        message += "Novos cards já estavam em 0"
+    log_action(
+        action,
+        {"changes": [change.describe() for change in changes], "written": written},
+        event=event
+    )
 
-    show_tooltip(message, duration=5000)
-    log_action("Manual pause activated")
+    return written
 
 
-def resume_all_new_cards() -> None:
+def set_new_cards_limit(
+    limit: int,
+    dry_run: bool = False,
+    config_ids: Optional[FrozenSet[int]] = None,
+    deck_ids: Optional[FrozenSet[int]] = None,
+) -> List[str]:
     """
-    Resume new cards from manual pause.
+    Set the new cards per day limit for all deck configurations AND individual decks.
+
+    Args:
+        limit: The new limit to set (0 to block new cards)
+        dry_run: If True, only simulate the changes without applying
+        config_ids: Only change these presets (default: all)
+        deck_ids: Only change these decks (default: all)
+
+    Returns:
+        List of messages describing what was changed
     """
-    config = get_addon_config()
-    config["manual_pause"] = False
-    save_addon_config(config)
+    if not get_collection():
+        return ["Error: Anki collection not available"]
+
+    changes = plan_new_cards_limit(limit, config_ids, deck_ids)
+
+    if not dry_run:
+        apply_limit_changes(
+            changes,
+            f"Weekend Blocker: limit {limit}",
+            f"Set new cards limit to {limit}",
+            "limits",
+        )
 
-    restore_weekday_limits()
-    log_action("Manual pause deactivated")
+    return [change.describe() for change in changes]
 
 
-def run_automatic_check(show_feedback: bool = False) -> None:
+def get_todays_new_card_ids(deck_ids: Optional[FrozenSet[int]] = None) -> List[int]:
     """
-    Run the automatic weekend check.
-    This is the main function called on profile load.
+    Get the new cards that could actually be introduced today.
+
+    Walks the scheduler's deck tree and, for every deck with a non-zero
+    new count, takes at most that many of the deck's own new cards in due
+    order. Decks whose new count is already zero are skipped, so the cost
+    scales with the daily new limits rather than with collection size.
 
     Args:
-        show_feedback: If True, shows user feedback messages
+        deck_ids: Only take cards from these decks (default: all)
+
+    Returns:
+        List of card ids
     """
-    config = get_addon_config()
+    col = get_collection()
+    if not col:
+        return []
 
-    # Check if addon is enabled
-    if not config.get("enabled", True):
-        if show_feedback:
-            show_tooltip(tr("tooltip_addon_disabled"))
-        return
-
-    # Save original limits on first run
-    save_original_limits()
-
-    # If manual pause is active, keep new cards at 0
-    if config.get("manual_pause", False):
-        if show_feedback:
-            show_tooltip(tr("tooltip_manual_pause_active"))
-        set_new_cards_limit(0)
-        return
-
-    # Apply weekend logic
-    if is_weekend():
-        apply_weekend_block()
-        if show_feedback and not is_weekend():
-            # Only show if we actually applied changes
-            pass  # apply_weekend_block already shows tooltip
-    else:
-        restore_weekday_limits()
-        if show_feedback and is_weekend():
-            # Only show if we actually applied changes
-            pass  # restore_weekday_limits already shows tooltip
+    card_ids = []
+    nodes = list(col.sched.deck_due_tree().children)
 
-    # Update last run timestamp
-    import datetime
-    config["last_run"] = datetime.datetime.now().isoformat()
-    save_addon_config(config)
+    while nodes:
+        node = nodes.pop()
+        nodes.extend(node.children)
 
+        if node.new_count <= 0:
+            continue
 
-def get_status_info() -> str:
+        if deck_ids is not None and node.deck_id not in deck_ids:
+            continue
+
+        # queue 0 = new cards that are neither buried nor suspended
+        card_ids.extend(col.db.list(
+            "select id from cards where did = ? and queue = 0 order by due limit ?",
+            node.deck_id,
+            node.new_count,
+        ))
+
+    return card_ids
+
+
+def get_bury_candidates(
+    deck_ids: Optional[FrozenSet[int]] = None, all_new: bool = False
+) -> List[int]:
     """
-    Get current status information for display.
+    Get the new cards a weekend block should bury.
+
+    With the default "today" bury mode only the cards the scheduler could
+    show today are buried; the "all" mode buries every new card in the
+    collection.
+
+    Args:
+        deck_ids: Only take cards of these decks (default: all)
+        all_new: Take every new card whatever the bury mode, for decks
+            whose limit is left open
 
     Returns:
-        str: Formatted status message
+        List of card ids
     """
-    config = get_addon_config()
-    deck_configs = get_all_deck_configs()
+    col = get_collection()
+    if not col:
+        return []
 
-    status = f"{tr('status_title')}\n\n"
-    status += f"{tr('status_today')}: {get_day_name()}\n"
-    status += f"{tr('status_weekend')}: {'✅' if is_weekend() else '❌'}\n"
-    status += f"{tr('status_enabled')}: {'✅' if config.get('enabled', True) else '❌'}\n"
-    status += f"{tr('status_manual_pause')}: {'✅' if config.get('manual_pause', False) else '❌'}\n\n"
+    with perf.phase("bury_candidates"):
+        if not all_new and get_addon_config().get("bury_mode", "today") != "all":
+            return get_todays_new_card_ids(deck_ids)
 
-    status += f"{tr('status_deck_configs')}:\n"
-    for config_id, deck_config in deck_configs.items():
-        name = deck_config["name"]
-        current = deck_config["new_per_day"]
-        original = config.get("original_limits", {}).get(str(config_id), "?")
+        if deck_ids is None:
+            return list(col.find_cards("is:new -is:suspended"))
+
+        if not deck_ids:
+            return []
+
+        from anki.utils import ids2str
+
+        return col.db.list(f"select id from cards where queue = 0 and did in {ids2str(deck_ids)}")
 
-        # Format the deck info more clearly
-        status += f"  • {name}\n"
-        status += f"      {tr('status_current')}: {current} {tr('status_cards_per_day')}\n"
-        status += f"      {tr('status_backup')}: {original} {tr('status_cards_per_day')}\n"
 
-    return status
+def bury_cards(card_ids: List[int]) -> int:
+    """
+    Bury new cards and record them, so unbury_new_cards() can undo only that.
+
+    Cards that stopped being new since they were planned are skipped.
+
+    Args:
+        card_ids: Card ids from get_bury_candidates()
+
+    Returns:
+        int: Number of cards buried
+    """
+    col = get_collection()
+    if not col or not card_ids:
+        return 0
+
+    from anki.utils import ids2str
+
+    with perf.phase("bury"):
+        new_card_ids = col.db.list(
+            f"select id from cards where queue = 0 and id in {ids2str(card_ids)}"
+        )
+
+        if not new_card_ids:
+            return 0
+
+        # Bury these cards for today (they'll come back tomorrow if unburied)
+        _record_op_changes(col.sched.bury_cards(new_card_ids, manual=False))
+
+        # Remember exactly what we buried so unbury_new_cards() can undo only that
+        set_buried_ids(col.path, get_buried_ids(col.path) + list(new_card_ids))
+        invalidate_status_model()
+
+    perf.count("cards_buried", len(new_card_ids))
+
+    log_action(
+        f"Buried {len(new_card_ids)} new cards",
+        {"count": len(new_card_ids)},
+        event="bury"
+    )
+
+    return len(new_card_ids)
+
+
+def bury_new_cards_in_queue(deck_ids: Optional[FrozenSet[int]] = None) -> int:
+    """
+    Bury the new cards that are currently in today's queue.
+    This ensures that cards already scheduled for today won't appear.
+
+    Args:
+        deck_ids: Only bury cards of these decks (default: all)
+
+    Returns:
+        int: Number of cards buried
+    """
+    return bury_cards(get_bury_candidates(deck_ids))
+
+
+def plan_today_only_limit(deck_ids: Optional[FrozenSet[int]] = None) -> List[LimitChange]:
+    """
+    Plan a "today only" new cards limit of 0 on every top-level deck.
+
+    Args:
+        deck_ids: Set the limit on these decks instead of the top-level ones
+
+    Returns:
+        List of changes, without applying them
+    """
+    col = get_collection()
+    if not col:
+        return []
+
+    today = col.sched.today
+    changes = []
+
+    for deck_ref in col.decks.all_names_and_ids(include_filtered=False):
+        if deck_ids is not None:
+            if deck_ref.id not in deck_ids:
+                continue
+        # Limits of a parent deck also cap its subdecks
+        elif "::" in deck_ref.name:
+            continue
+
+        deck = col.decks.get(deck_ref.id)
+        current = deck.get("newLimitToday") or {}
+
+        if current != {"limit": 0, "today": today}:
+            old = current.get("limit") if current.get("today") == today else None
+            changes.append(LimitChange(TODAY, deck_ref.id, deck_ref.name, old, 0, source=deck))
+
+    return changes
+
+
+def set_today_only_limit(
+    dry_run: bool = False,
+    deck_ids: Optional[FrozenSet[int]] = None,
+) -> List[str]:
+    """
+    Set a "today only" new cards limit of 0 on every top-level deck.
+
+    Presets and per-deck limits are left untouched and the override
+    expires by itself when the next day starts, so no backup is needed
+    and nothing has to be restored on weekdays.
+
+    Args:
+        dry_run: If True, only simulate the changes without applying
+        deck_ids: Set the limit on these decks instead of the top-level ones
+
+    Returns:
+        List of messages describing what was changed
+    """
+    if not get_collection():
+        return ["Error: Anki collection not available"]
+
+    changes = plan_today_only_limit(deck_ids)
+
+    if not dry_run:
+        apply_limit_changes(
+            changes,
+            "Weekend Blocker: block today",
+            "Set today-only new cards limit to 0",
+            "limits",
+        )
+
+    return [change.describe() for change in changes]
+
+
+def unbury_cards(card_ids: List[int]) -> int:
+    """
+    Unbury cards the addon buried.
+
+    Anki unburies cards by itself at the start of a new day, so only the
+    ones that are still buried are touched.
+
+    Args:
+        card_ids: Recorded card ids
+
+    Returns:
+        int: Number of cards unburied
+    """
+    col = get_collection()
+    if not col or not card_ids:
+        return 0
+
+    from anki.utils import ids2str
+
+    with perf.phase("unbury"):
+        # queue -2 = buried by the scheduler
+        buried_new_cards = col.db.list(
+            f"select id from cards where queue = -2 and id in {ids2str(card_ids)}"
+        )
+
+        if not buried_new_cards:
+            return 0
+
+        # Unbury these cards
+        _record_op_changes(col.sched.unbury_cards(buried_new_cards))
+
+    perf.count("cards_unburied", len(buried_new_cards))
+
+    log_action(
+        f"Unburied {len(buried_new_cards)} new cards",
+        {"count": len(buried_new_cards)},
+        event="unbury"
+    )
+
+    return len(buried_new_cards)
+
+
+def unbury_new_cards() -> int:
+    """
+    Unbury the new cards that were buried by the addon.
+
+    Only the cards recorded by bury_cards() are considered, so cards buried
+    by the user or by other addons are left alone, and no collection-wide
+    search is needed.
+
+    Returns:
+        int: Number of cards unburied
+    """
+    col = get_collection()
+    if not col:
+        return 0
+
+    recorded_ids = get_buried_ids(col.path)
+
+    if not recorded_ids:
+        return 0
+
+    set_buried_ids(col.path, [])
+    invalidate_status_model()
+    return unbury_cards(recorded_ids)
+
+
+def plan_restore_limits(
+    config_ids: Optional[FrozenSet[int]] = None,
+    deck_ids: Optional[FrozenSet[int]] = None,
+    original_limits: Optional[Dict[str, int]] = None,
+) -> List[LimitChange]:
+    """
+    Plan setting the new cards per day limits back to the values in the backup.
+
+    Args:
+        config_ids: Only restore these presets (default: all)
+        deck_ids: Only restore these decks (default: all)
+        original_limits: Backup already read by the caller (default: read it)
+
+    Returns:
+        List of changes, without applying them
+    """
+    col = get_collection()
+    if not col:
+        return []
+
+    if original_limits is None:
+        with perf.phase("read_backup"):
+            original_limits = get_original_limits()
+    changes = []
+
+    # Restore deck config limits
+    with perf.phase("presets"):
+        all_config = col.decks.all_config()
+        perf.count("presets_scanned", len(all_config))
+
+        for deck_config in all_config:
+            config_id = deck_config["id"]
+            config_key = f"config_{config_id}"
+
+            if config_ids is not None and config_id not in config_ids:
+                continue
+
+            if config_key in original_limits:
+                original_limit = original_limits[config_key]
+                current_limit = deck_config.get("new", {}).get("perDay", 0)
+
+                if current_limit != original_limit:
+                    config_name = deck_config.get("name", f"Config {config_id}")
+                    changes.append(LimitChange(
+                        CONFIG, config_id, config_name, current_limit, original_limit,
+                        restore=True, source=deck_config,
+                    ))
+
+    # Restore individual deck limits
+    with perf.phase("decks"):
+        all_decks = col.decks.all()
+        perf.count("decks_scanned", len(all_decks))
+
+        for deck in all_decks:
+            deck_id = deck.get("id")
+            deck_key = f"deck_{deck_id}"
+
+            if deck_ids is not None and deck_id not in deck_ids:
+                continue
+
+            if deck_key in original_limits:
+                original_limit = original_limits[deck_key]
+
+                # Only restore if the deck has the override
+                if "new" in deck and "perDay" in deck["new"]:
+                    current_limit = deck["new"]["perDay"]
+
+                    if current_limit != original_limit:
+                        deck_name = deck.get("name", "Unknown")
+                        changes.append(LimitChange(
+                            DECK, deck_id, deck_name, current_limit, original_limit,
+                            restore=True, source=deck,
+                        ))
+
+    return changes
+
+
+def restore_original_limits(
+    dry_run: bool = False,
+    config_ids: Optional[FrozenSet[int]] = None,
+    deck_ids: Optional[FrozenSet[int]] = None,
+) -> List[str]:
+    """
+    Set the new cards per day limits back to the values in the backup.
+
+    Args:
+        dry_run: If True, only simulate the changes without applying
+        config_ids: Only restore these presets (default: all)
+        deck_ids: Only restore these decks (default: all)
+
+    Returns:
+        List of messages describing what was changed
+    """
+    if not get_collection():
+        return ["Error: Anki collection not available"]
+
+    changes = plan_restore_limits(config_ids, deck_ids)
+
+    if not dry_run:
+        apply_limit_changes(
+            changes, "Weekend Blocker: restore limits", "Restored weekday limits", "restore"
+        )
+
+    return [change.describe() for change in changes]
+
+
+def plan_block(
+    today_only: bool,
+    selection: Optional[BlockSelection] = None,
+    original_limits: Optional[Dict[str, int]] = None,
+) -> CheckPlan:
+    """
+    Plan blocking new cards for today.
+
+    Args:
+        today_only: Use today-only deck limits instead of rewriting presets
+        selection: Decks and presets to block (default: all)
+        original_limits: Backup already read by the caller (default: read it)
+
+    Returns:
+        CheckPlan with target "block"
+    """
+    if today_only:
+        if selection is None:
+            return CheckPlan("block", True, tuple(plan_today_only_limit()))
+
+        # Decks with an open subdeck get no limit, so their own new cards
+        # are buried instead
+        return CheckPlan(
+            "block",
+            True,
+            tuple(plan_today_only_limit(selection.today_only_roots)),
+            bury=tuple(get_bury_candidates(selection.partial_decks, all_new=True)),
+        )
+
+    if selection is None:
+        # Today's cards are read before the limits drop to 0
+        return CheckPlan(
+            "block", False, tuple(plan_new_cards_limit(0)), bury=tuple(get_bury_candidates())
+        )
+
+    # Decks left open by the rules may still be blocked from an earlier day
+    if original_limits is None:
+        original_limits = get_original_limits()
+
+    limits = []
+    if original_limits:
+        limits = plan_restore_limits(
+            selection.open_presets, selection.open_decks, original_limits
+        )
+
+    limits += plan_new_cards_limit(0, selection.blocked_presets, selection.blocked_decks)
+
+    # Blocked decks sharing a preset with open decks keep a non-zero limit,
+    # so every one of their new cards is buried, not only today's
+    shared = selection.shared_preset_decks
+    bury = get_bury_candidates(selection.blocked_decks - shared)
+    if shared:
+        bury += get_bury_candidates(shared, all_new=True)
+
+    return CheckPlan("block", False, tuple(limits), bury=tuple(bury))
+
+
+def plan_restore(
+    today_only: bool, original_limits: Optional[Dict[str, int]] = None
+) -> CheckPlan:
+    """
+    Plan restoring the original limits and unburying the buried cards.
+
+    Args:
+        today_only: Whether today-only limits are used; the backup is then
+            only left over from a pause and is dropped once restored
+        original_limits: Backup already read by the caller (default: read it)
+
+    Returns:
+        CheckPlan with target "restore"
+    """
+    col = get_collection()
+    if not col:
+        return CheckPlan("restore", today_only)
+
+    if original_limits is None:
+        original_limits = get_original_limits()
+    if not original_limits:
+        return CheckPlan("restore", today_only)
+
+    return CheckPlan(
+        "restore",
+        today_only,
+        tuple(plan_restore_limits(original_limits=original_limits)),
+        unbury=tuple(get_buried_ids(col.path)),
+        has_backup=True,
+        clear_backup=today_only,
+    )
+
+
+def apply_check_plan(plan: CheckPlan, show_feedback: bool = False) -> Optional[str]:
+    """
+    Apply a plan built by plan_block(), plan_restore() or get_check_plan().
+
+    Args:
+        plan: Plan to apply
+        show_feedback: If True, also report an active manual pause
+
+    Returns:
+        Optional[str]: Summary message for the user
+    """
+    col = get_collection()
+    if not col:
+        return "Error: Anki collection not available"
+
+    # The collection state the plan was built from is about to change
+    invalidate_check_plan()
+
+    restores = [change for change in plan.limits if change.restore]
+    limits = [change for change in plan.limits if not change.restore]
+
+    if plan.target == "pause":
+        apply_limit_changes(
+            limits, "Weekend Blocker: limit 0", "Set new cards limit to 0", "limits"
+        )
+        return tr("tooltip_manual_pause_active") if show_feedback else None
+
+    if plan.target == "block":
+        # First, bury any new cards already in today's queue
+        buried_count = bury_cards(list(plan.bury))
+
+        # Then set the limit to 0 to prevent more cards from appearing
+        apply_limit_changes(
+            restores, "Weekend Blocker: restore limits", "Restored weekday limits", "restore"
+        )
+        if plan.today_only:
+            apply_limit_changes(
+                limits,
+                "Weekend Blocker: block today",
+                "Set today-only new cards limit to 0",
+                "limits",
+            )
+        else:
+            apply_limit_changes(
+                limits, "Weekend Blocker: limit 0", "Set new cards limit to 0", "limits"
+            )
+
+        changes = plan.messages()
+
+        if changes or buried_count > 0:
+            message = f"{tr('weekend_blocked_title')}\n\n"
+            message += f"{tr('status_today')}: {get_day_name()}\n\n"
+
+            if buried_count > 0:
+                message += f"{tr('weekend_buried')}: {buried_count}\n"
+
+            if changes:
+                message += f"{tr('weekend_changes')}:\n" + "\n".join(changes)
+
+            return message
+
+        return f"{tr('tooltip_already_blocked')} ({get_day_name()})"
+
+    if not plan.has_backup:
+        # Today-only limits expire by themselves: nothing to restore
+        if plan.today_only:
+            return f"{tr('tooltip_already_correct')} ({get_day_name()})"
+        return tr("tooltip_no_backup")
+
+    # First, unbury any cards that were buried
+    if plan.unbury:
+        set_buried_ids(col.path, [])
+    unburied_count = unbury_cards(list(plan.unbury))
+
+    apply_limit_changes(
+        restores, "Weekend Blocker: restore limits", "Restored weekday limits", "restore"
+    )
+
+    # Presets were rewritten by an earlier pause or by preset mode; once
+    # they are back to normal the backup is no longer needed
+    if plan.clear_backup:
+        set_original_limits(col.path, {})
+
+    changes = plan.messages()
+
+    if changes or unburied_count > 0:
+        message = f"{tr('weekday_restored_title')}\n\n"
+        message += f"{tr('status_today')}: {get_day_name()}\n\n"
+
+        if unburied_count > 0:
+            message += f"{tr('weekday_unburied')}: {unburied_count}\n"
+
+        if changes:
+            message += f"{tr('weekday_restored')}:\n" + "\n".join(changes)
+
+        return message
+
+    return f"{tr('tooltip_already_correct')} ({get_day_name()})"
+
+
+def apply_weekend_block(selection: Optional[BlockSelection] = None) -> str:
+    """
+    Apply weekend blocking: set new cards per day to 0 and bury cards already in queue.
+
+    Args:
+        selection: Decks and presets to block (default: all)
+
+    Returns:
+        str: Summary message for the user
+    """
+    return apply_check_plan(plan_block(False, selection))
+
+
+def apply_today_only_block(selection: Optional[BlockSelection] = None) -> str:
+    """
+    Apply weekend blocking with today-only deck limits.
+
+    Args:
+        selection: Decks to block (default: all)
+
+    Returns:
+        str: Summary message for the user
+    """
+    return apply_check_plan(plan_block(True, selection))
+
+
+def rollback_to_snapshot(snapshot_id: int) -> str:
+    """
+    Put the limits back to how they were just before a snapshot was taken.
+
+    All presets and decks are written in one batch (one undo entry), and
+    the rollback itself is recorded as a new snapshot. The rolled-back
+    values also replace the backup of the original limits, so the next
+    check keeps them; limits held at 0 by a block or pause only change in
+    the backup and are restored when the block ends.
+
+    Args:
+        snapshot_id: Id from storage.list_snapshots()
+
+    Returns:
+        str: Summary message for the user
+    """
+    col = get_collection()
+    if not col:
+        return "Error: Anki collection not available"
+
+    try:
+        original_limits = get_original_limits()
+    except LimitsReadError:
+        return tr("tooltip_backup_unreadable")
+
+    limits = get_snapshot_limits(col.path, snapshot_id)
+    changes = []
+
+    for config in col.decks.all_config():
+        key = f"config_{config['id']}"
+        current_limit = config.get("new", {}).get("perDay")
+
+        if key in limits and current_limit != limits[key]:
+            changes.append(LimitChange(
+                CONFIG, config["id"], config.get("name"), current_limit, limits[key],
+                restore=True, source=config,
+            ))
+
+    for deck in col.decks.all():
+        key = f"deck_{deck.get('id')}"
+        current_limit = deck.get("new", {}).get("perDay")
+
+        if key in limits and current_limit is not None and current_limit != limits[key]:
+            changes.append(LimitChange(
+                DECK, deck["id"], deck.get("name"), current_limit, limits[key],
+                restore=True, source=deck,
+            ))
+
+    if not changes:
+        return tr("snapshot_nothing")
+
+    applied = get_applied_limits(col.path)
+    held = []
+    writes = []
+
+    for change in changes:
+        if change.key not in original_limits or applied.get(change.key) != change.old:
+            writes.append(change)
+        elif original_limits[change.key] != change.new:
+            held.append(change._replace(old=original_limits[change.key]))
+
+    if not writes and not held:
+        return tr("snapshot_nothing")
+
+    invalidate_check_plan()
+
+    backup = {change.key: change.new for change in writes + held if change.key in original_limits}
+    if backup:
+        update_original_limits(col.path, backup)
+
+    apply_limit_changes(
+        writes,
+        f"Weekend Blocker: roll back to #{snapshot_id}",
+        f"Rolled back limits to snapshot {snapshot_id}",
+        "restore",
+    )
+
+    sections = []
+    if writes:
+        sections.append((tr("snapshot_rolled_back"), writes))
+    if held:
+        sections.append((tr("snapshot_after_block"), held))
+
+    return "\n\n".join(
+        f"{title}:\n" + "\n".join(change.describe() for change in section)
+        for title, section in sections
+    )
+
+
+def restore_weekday_limits() -> str:
+    """
+    Restore original new cards per day limits for weekdays and unbury cards.
+
+    Returns:
+        str: Summary message for the user
+    """
+    if not get_collection():
+        return "Error: Anki collection not available"
+
+    try:
+        plan = plan_restore(today_only=False)
+    except LimitsReadError:
+        return tr("tooltip_backup_unreadable")
+
+    return apply_check_plan(plan)
+
+
+def pause_all_new_cards() -> str:
+    """
+    Manually pause all new cards (useful for vacations).
+
+    Returns:
+        str: Summary message for the user
+    """
+    # A pause spans several days, so it always rewrites the presets
+    try:
+        save_original_limits()
+    except LimitsReadError:
+        return tr("tooltip_backup_unreadable")
+
+    config = get_addon_config()
+    config["manual_pause"] = True
+    save_addon_config(config)
+
+    changes = set_new_cards_limit(0)
+
+    message = f"{tr('pause_title')}\n\n"
+    if changes:
+        message += f"{tr('weekend_changes')}:\n" + "\n".join(changes)
+    else:
+        message += tr("pause_already_zero")
+
+    log_action("Manual pause activated", event="pause")
+    return message
+
+
+def resume_all_new_cards() -> str:
+    """
+    Resume new cards from manual pause.
+
+    Returns:
+        str: Summary message for the user
+    """
+    config = get_addon_config()
+    config["manual_pause"] = False
+    save_addon_config(config)
+
+    message = restore_weekday_limits()
+    log_action("Manual pause deactivated", event="pause")
+    return message
+
+
+def run_automatic_check(show_feedback: bool = False) -> Optional[str]:
+    """
+    Run the automatic weekend check.
+    This is the main function called on profile load.
+
+    It does not touch the UI, so it can run on a background thread; the
+    caller is responsible for showing the returned message.
+
+    If the collection fingerprint still matches the one stored after the
+    last run, the check returns before scanning or writing anything.
+    The addon config and the action log are each written at most once
+    per check.
+
+    The time of each phase, a few counters and the number of backend calls
+    are logged as a "perf" event; with the "profile_checks" config option
+    a cProfile file is also written to user_files/profiles.
+
+    Args:
+        show_feedback: If True, also report when nothing was checked
+            (addon disabled or manual pause active)
+
+    Returns:
+        Optional[str]: Message to show the user, or None
+    """
+    profile_dir = None
+    if get_addon_config().get("profile_checks", False):
+        profile_dir = os.path.join(USER_FILES_DIR, "profiles")
+
+    with batched_config_writes(), buffered_log():
+        with perf.record(profile_dir) as timings:
+            with using_collection(perf.counting_collection(get_collection())):
+                message = _run_check(show_feedback)
+
+        log_action("Check timings", timings.as_dict(), event="perf")
+
+    return message
+
+
+def get_check_target(selection: Optional[BlockSelection] = None) -> str:
+    """
+    Decide what the check should apply today.
+
+    Args:
+        selection: Result of get_block_selection(), if deck rules are set;
+            today is then blocked when any deck or preset is blocked
+
+    Returns:
+        str: "pause" (manual pause active), "block" (weekend) or "restore"
+    """
+    rules = ScheduleRules.from_config(get_addon_config())
+    target = decide(get_today(), rules)
+
+    if target == "pause" or selection is None:
+        return target
+
+    return "block" if selection.blocked_decks or selection.blocked_presets else "restore"
+
+
+def get_rules_key() -> str:
+    """
+    Get a short hash of the "deck_rules" config option.
+
+    Returns:
+        str: Hash, or an empty string if no deck rules are set
+    """
+    rules = get_addon_config().get("deck_rules")
+    if not rules:
+        return ""
+    return hashlib.sha1(json.dumps(rules, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+def invalidate_check_plan() -> None:
+    """
+    Drop the cached check plan (after the addon changed the collection).
+    The status model shows the plan, so it is dropped as well.
+    """
+    global _plan_cache
+    _plan_cache = None
+    invalidate_status_model()
+
+
+def invalidate_status_model() -> None:
+    """
+    Drop the cached status model.
+    """
+    global _status_cache
+    _status_cache = None
+
+
+def _get_check_inputs() -> Tuple[str, bool, str]:
+    """
+    Get the target, today-only flag and fingerprint key of a check.
+
+    Only the config and the scheduler are read. With deck rules the key
+    holds a hash of the rules rather than the target they resolve to, so
+    an unchanged collection is recognised without scanning its decks.
+    """
+    target = get_check_target()
+    today_only = target != "pause" and uses_today_only_limits()
+    fingerprint_key = f"{target}:{'today_only' if today_only else 'preset'}"
+
+    rules_key = get_rules_key()
+    if rules_key:
+        fingerprint_key += f":{rules_key}"
+
+    return target, today_only, fingerprint_key
+
+
+def build_check_plan(
+    target: str,
+    today_only: bool,
+    fingerprint: str,
+    original_limits: Optional[Dict[str, int]] = None,
+) -> CheckPlan:
+    """
+    Build the plan of a check, or reuse the cached one.
+
+    The plan is cached under the collection fingerprint, so a preview
+    followed by the check itself scans the presets and decks only once.
+    Deck rules are resolved here, on a cache miss only.
+
+    Args:
+        target: Value returned by get_check_target() without a selection
+        today_only: Whether today-only limits are used
+        fingerprint: Value returned by get_collection_fingerprint()
+        original_limits: Backup already read by the caller (default: read it)
+
+    Returns:
+        CheckPlan
+    """
+    global _plan_cache
+
+    col = get_collection()
+    key = f"{col.path}|{fingerprint}|{get_addon_config().get('bury_mode', 'today')}"
+
+    if _plan_cache is not None and _plan_cache[0] == key:
+        return _plan_cache[1]
+
+    selection = None
+    if target != "pause" and get_rules_key():
+        with perf.phase("rules"):
+            selection = get_block_selection()
+        target = get_check_target(selection)
+
+    if target == "pause":
+        plan = CheckPlan("pause", False, tuple(plan_new_cards_limit(0)))
+    elif target == "block":
+        plan = plan_block(today_only, selection, original_limits)
+    else:
+        plan = plan_restore(today_only, original_limits)
+
+    _plan_cache = (key, plan)
+    return plan
+
+
+def get_check_plan(read_only: bool = False) -> Optional[CheckPlan]:
+    """
+    Get what the check would do right now, without applying it.
+
+    Limits the user changed since the last check are tracked first, as
+    the check does, so the plan matches what it would apply.
+
+    Args:
+        read_only: Don't write anything, not even the one-time move of an
+            old backup or the tracked limits (for dry runs)
+
+    Returns:
+        CheckPlan, or None if the collection is not available
+
+    Raises:
+        LimitsReadError: If the stored backup could not be read
+    """
+    if not get_collection():
+        return None
+
+    target, today_only, fingerprint_key = _get_check_inputs()
+
+    original_limits = None
+    if not today_only or target != "block":
+        original_limits = get_original_limits(read_only=read_only)
+
+    if not today_only:
+        if read_only:
+            track_limit_changes(original_limits, read_only=True)
+        else:
+            original_limits = save_original_limits(original_limits)
+
+    return build_check_plan(
+        target, today_only, get_collection_fingerprint(fingerprint_key), original_limits
+    )
+
+
+def _run_check(show_feedback: bool) -> Optional[str]:
+    """Body of run_automatic_check(), run inside write batches."""
+    config = get_addon_config()
+
+    # Check if addon is enabled
+    if not config.get("enabled", True):
+        return tr("tooltip_addon_disabled") if show_feedback else None
+
+    col = get_collection()
+    if not col:
+        return None
+
+    with perf.phase("inputs"):
+        target, today_only, fingerprint_key = _get_check_inputs()
+
+    with perf.phase("fingerprint"):
+        fingerprint = get_collection_fingerprint(fingerprint_key)
+
+    # Fast path: nothing changed since the state we last applied
+    if fingerprint == get_fingerprint(col.path):
+        log_action(
+            "Check skipped (fast path)", {"target": target, "fast_path": True}, event="check"
+        )
+
+        if target == "block":
+            return f"{tr('tooltip_already_blocked')} ({get_day_name()})"
+        if target == "restore":
+            return f"{tr('tooltip_already_correct')} ({get_day_name()})"
+        return tr("tooltip_manual_pause_active") if show_feedback else None
+
+    # The backup is read once and passed along to every step; blocking
+    # with today-only limits does not need it
+    original_limits = None
+    if not today_only or target != "block":
+        with perf.phase("read_backup"):
+            try:
+                original_limits = get_original_limits()
+            except LimitsReadError as e:
+                # Taking the blocked limits as the originals would lose them
+                log_action("Check skipped", {"target": target, "error": str(e)}, event="check")
+                return tr("tooltip_backup_unreadable")
+
+    # Save original limits on first run (not needed for today-only limits)
+    with perf.phase("backup"):
+        if not today_only:
+            original_limits = save_original_limits(original_limits)
+
+    with perf.phase("plan"):
+        plan = build_check_plan(target, today_only, fingerprint, original_limits)
+
+    with perf.phase("apply"):
+        message = apply_check_plan(plan, show_feedback)
+
+    # Remember what was applied, including our own writes
+    set_fingerprint(col.path, get_collection_fingerprint(fingerprint_key))
+    log_action("Check completed", {"target": plan.target, "fast_path": False}, event="check")
+
+    # Update last run timestamp
+    config = get_addon_config()
+    config["last_run"] = datetime.datetime.now().isoformat()
+    save_addon_config(config)
+
+    return message
+
+
+def _build_limit_rows(original_limits: Dict[str, int]) -> Tuple[LimitRow, ...]:
+    """List the limits of all presets and of the decks with their own limit."""
+    col = get_collection()
+    rows = []
+
+    for config in col.decks.all_config():
+        config_id = config["id"]
+        rows.append(LimitRow(
+            CONFIG,
+            config_id,
+            config.get("name", f"Config {config_id}"),
+            config.get("new", {}).get("perDay", 20),
+            original_limits.get(f"config_{config_id}"),
+        ))
+
+    for deck in col.decks.all():
+        if "new" in deck and "perDay" in deck["new"]:
+            deck_id = deck["id"]
+            rows.append(LimitRow(
+                DECK,
+                deck_id,
+                deck.get("name", "Unknown"),
+                deck["new"]["perDay"],
+                original_limits.get(f"deck_{deck_id}"),
+            ))
+
+    return tuple(rows)
+
+
+def get_status_model() -> StatusModel:
+    """
+    Get the state shown by the status dialog.
+
+    The model is cached under the collection fingerprint and the addon's
+    state, so reopening the dialog or re-sorting its table reads nothing
+    but a couple of aggregate queries until something changes.
+
+    Returns:
+        StatusModel (without limits or pending changes if no collection
+        is open)
+    """
+    global _status_cache
+
+    config = get_addon_config()
+    today = get_today()
+    col = get_collection()
+
+    if not col:
+        return StatusModel(
+            today,
+            is_weekend(today),
+            config.get("enabled", True),
+            config.get("manual_pause", False),
+            config.get("last_run"),
+            0,
+        )
+
+    target, today_only, fingerprint_key = _get_check_inputs()
+    fingerprint = get_collection_fingerprint(fingerprint_key)
+    key = json.dumps([
+        col.path,
+        fingerprint,
+        config.get("enabled", True),
+        config.get("manual_pause", False),
+        config.get("last_run"),
+        config.get("bury_mode", "today"),
+    ])
+
+    if _status_cache is not None and _status_cache[0] == key:
+        return _status_cache[1]
+
+    try:
+        original_limits = get_original_limits()
+        pending = build_check_plan(target, today_only, fingerprint, original_limits)
+    except LimitsReadError as e:
+        print(f"Weekend Blocker: {e}")
+        original_limits = {}
+        pending = None
+
+    model = StatusModel(
+        today,
+        is_weekend(today),
+        config.get("enabled", True),
+        config.get("manual_pause", False),
+        config.get("last_run"),
+        len(get_buried_ids(col.path)),
+        _build_limit_rows(original_limits),
+        pending,
+    )
+
+    _status_cache = (key, model)
+    return model
+
+
+def get_status_info() -> str:
+    """
+    Get current status information for display.
+
+    The limits of every preset and deck are listed by the status dialog's
+    table; this is the summary shown above it.
+
+    Returns:
+        str: Formatted status message
+    """
+    lines = get_status_model().summary_lines()
+
+    timings = perf.get_last_timings()
+    if timings:
+        lines += ["", f"{tr('status_timings')}: {timings['total_ms']} ms"]
+        for name, milliseconds in timings["phases_ms"].items():
+            lines.append(f"  • {name}: {milliseconds} ms")
+        counts = timings["counts"]
+        if counts:
+            lines.append("  • " + ", ".join(f"{name}: {value}" for name, value in counts.items()))
+        lines.append(f"  • {tr('status_backend_calls')}: {sum(timings['calls'].values())}")
+        startup = timings["import_ms"] + timings.get("load_ms", 0)
+        lines.append(f"  • {tr('status_startup_cost')}: {startup:.2f} ms")
+
+    return "\n".join(lines)
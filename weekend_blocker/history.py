@@ -0,0 +1,262 @@
+"""
+Query API over the Weekend Blocker action log.
+Reads actions.log as a stream, using a small sidecar index of byte
+offsets by date and event type so queries don't load the whole file.
+"""
+
+import datetime
+import gzip
+import json
+import os
+from typing import Dict, Iterable, Iterator, List, Optional
+
+INDEX_VERSION = 1
+
+# Event types of entries written before log_action() recorded them
+_LEGACY_EVENTS = (
+    ("Saved original limits", "backup"),
+    ("Set new cards limit", "limits"),
+    ("Set today-only", "limits"),
+    ("Buried", "bury"),
+    ("Unburied", "unbury"),
+    ("Restored weekday limits", "restore"),
+    ("Manual pause", "pause"),
+    ("Check ", "check"),
+)
+
+
+def get_event(entry: dict) -> str:
+    """
+    Get the event type of a log entry.
+
+    Args:
+        entry: Parsed log entry
+
+    Returns:
+        str: Event type (e.g. "bury"), "other" if unknown
+    """
+    if "event" in entry:
+        return entry["event"]
+
+    action = entry.get("action", "")
+    for prefix, event in _LEGACY_EVENTS:
+        if action.startswith(prefix):
+            return event
+
+    return "other"
+
+
+def _entry_date(entry: dict) -> str:
+    """Get the date part (YYYY-MM-DD) of an entry's timestamp."""
+    return str(entry.get("timestamp", ""))[:10]
+
+
+class LogIndex:
+    """
+    Byte-offset index of a JSON-lines log, grouped by date and event type.
+
+    The index is stored next to the log and extended incrementally: only
+    the lines appended since the last update are read. If the log was
+    rotated or rewritten, the index is rebuilt.
+    """
+
+    def __init__(self, log_path: str, index_path: Optional[str] = None) -> None:
+        self.log_path = log_path
+        self.index_path = index_path or log_path + ".idx"
+        # date -> event -> list of byte offsets
+        self.dates: Dict[str, Dict[str, List[int]]] = {}
+        self._size = 0
+        self._head = ""
+
+    def update(self) -> None:
+        """Bring the index up to date with the log file."""
+        self._load()
+
+        try:
+            size = os.path.getsize(self.log_path)
+        except OSError:
+            self._reset()
+            return
+
+        head = self._read_head()
+        if size < self._size or head != self._head:
+            # The log was rotated or replaced
+            self._reset()
+            self._head = head
+
+        if size == self._size:
+            return
+
+        with open(self.log_path, "rb") as f:
+            f.seek(self._size)
+            offset = self._size
+
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Partially written line: index it next time
+                    break
+
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    entry = None
+
+                if isinstance(entry, dict):
+                    events = self.dates.setdefault(_entry_date(entry), {})
+                    events.setdefault(get_event(entry), []).append(offset)
+
+                offset += len(line)
+
+        self._size = offset
+        self._save()
+
+    def offsets(
+        self,
+        since: str,
+        until: str,
+        events: Optional[Iterable[str]] = None,
+    ) -> List[int]:
+        """
+        Get the offsets of the entries in a date range.
+
+        Args:
+            since: First date (YYYY-MM-DD), inclusive
+            until: Last date (YYYY-MM-DD), inclusive
+            events: Event types to include (None = all)
+
+        Returns:
+            Sorted list of byte offsets
+        """
+        wanted = set(events) if events is not None else None
+        result = []
+
+        for date, by_event in self.dates.items():
+            if not since <= date <= until:
+                continue
+
+            for event, offsets in by_event.items():
+                if wanted is None or event in wanted:
+                    result.extend(offsets)
+
+        result.sort()
+        return result
+
+    def first_date(self) -> Optional[str]:
+        """Get the oldest date in the index, or None if it is empty."""
+        return min(self.dates) if self.dates else None
+
+    def _read_head(self) -> str:
+        """Read the first line of the log, used to detect rotation."""
+        try:
+            with open(self.log_path, encoding="utf-8", errors="replace") as f:
+                return f.readline()
+        except OSError:
+            return ""
+
+    def _reset(self) -> None:
+        self.dates = {}
+        self._size = 0
+        self._head = ""
+
+    def _load(self) -> None:
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            self._reset()
+            return
+
+        if data.get("version") != INDEX_VERSION:
+            self._reset()
+            return
+
+        self.dates = data.get("dates", {})
+        self._size = data.get("size", 0)
+        self._head = data.get("head", "")
+
+    def _save(self) -> None:
+        data = {
+            "version": INDEX_VERSION,
+            "size": self._size,
+            "head": self._head,
+            "dates": self.dates,
+        }
+
+        try:
+            with open(self.index_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+        except OSError as e:
+            print(f"Weekend Blocker: Failed to write log index: {e}")
+
+
+def _read_at(log_path: str, offsets: List[int]) -> Iterator[dict]:
+    """Read the entries starting at the given byte offsets."""
+    with open(log_path, "rb") as f:
+        for offset in offsets:
+            f.seek(offset)
+            try:
+                yield json.loads(f.readline())
+            except ValueError:
+                continue
+
+
+def _scan_segment(
+    segment_path: str,
+    since: str,
+    until: str,
+    events: Optional[set],
+) -> Iterator[dict]:
+    """Stream the matching entries of a compressed log segment."""
+    with gzip.open(segment_path, "rt", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+
+            if not since <= _entry_date(entry) <= until:
+                continue
+            if events is None or get_event(entry) in events:
+                yield entry
+
+
+def query_history(
+    log_path: str,
+    days: int = 30,
+    events: Optional[Iterable[str]] = None,
+    segment_paths: Iterable[str] = (),
+) -> List[dict]:
+    """
+    Get the log entries of the last days, newest first.
+
+    The live log is read through its index; compressed segments are only
+    streamed when the range starts before the oldest live entry.
+
+    Args:
+        log_path: Path of the live log file
+        days: Number of days to look back (today included)
+        events: Event types to include (None = all)
+        segment_paths: Compressed segments, newest first
+
+    Returns:
+        List of log entries
+    """
+    today = datetime.date.today()
+    since = (today - datetime.timedelta(days=max(days, 1) - 1)).isoformat()
+    until = today.isoformat()
+    wanted = set(events) if events is not None else None
+
+    index = LogIndex(log_path)
+    index.update()
+
+    entries = []
+    if index.dates:
+        entries = list(_read_at(log_path, index.offsets(since, until, wanted)))
+
+    first_date = index.first_date()
+    if first_date is None or since < first_date:
+        for segment in segment_paths:
+            entries = list(_scan_segment(segment, since, until, wanted)) + entries
+
+    entries.reverse()
+    return entries
@@ -0,0 +1,200 @@
+"""
+Timing instrumentation for Weekend Blocker addon.
+Records the wall time of each phase of a check, a few counters (decks
+scanned, presets written, cards buried...) and the number of calls made
+to the collection backend. Outside record() everything is a no-op.
+"""
+
+import cProfile
+import datetime
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+# Collection attributes whose method calls are counted
+COUNTED_ATTRIBUTES = ("decks", "db", "sched")
+
+# Timings of the check being recorded, and of the last one
+_current: Optional["Timings"] = None
+_last: Optional[dict] = None
+
+
+class Timings:
+    """Phase times, counters and backend calls of one run."""
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        self.calls: Dict[str, int] = {}
+        self.total = 0.0
+        self.profile_file: Optional[str] = None
+
+    def as_dict(self) -> dict:
+        """
+        Get the timings in a JSON-serializable form.
+
+        Returns:
+            dict: "total_ms", "phases_ms", "counts", "calls", the addon's
+                own startup cost in "import_ms" / "load_ms" (see
+                get_import_timings()) and, if a profile was written,
+                "profile_file"
+        """
+        result = {
+            "total_ms": round(self.total * 1000, 2),
+            "phases_ms": {name: round(seconds * 1000, 2) for name, seconds in self.phases.items()},
+            "counts": dict(self.counts),
+            "calls": dict(self.calls),
+            **get_import_timings(),
+        }
+        if self.profile_file:
+            result["profile_file"] = self.profile_file
+        return result
+
+
+class _CountingProxy:
+    """Forwards to a backend object, counting the methods called on it."""
+
+    def __init__(self, target: Any, prefix: str, timings: Timings) -> None:
+        self._target = target
+        self._prefix = prefix
+        self._timings = timings
+
+    def __getattr__(self, name: str) -> Any:
+        value = getattr(self._target, name)
+
+        if self._prefix == "col" and name in COUNTED_ATTRIBUTES:
+            return _CountingProxy(value, name, self._timings)
+
+        if not callable(value):
+            return value
+
+        key = f"{self._prefix}.{name}"
+        calls = self._timings.calls
+
+        def counted(*args, **kwargs):
+            calls[key] = calls.get(key, 0) + 1
+            return value(*args, **kwargs)
+
+        return counted
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """
+    Add the time spent in the block to a phase of the current recording.
+
+    Args:
+        name: Phase name (times of the same phase add up)
+    """
+    timings = _current
+    if timings is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.phases[name] = timings.phases.get(name, 0.0) + time.perf_counter() - start
+
+
+def count(name: str, amount: int = 1) -> None:
+    """
+    Add to a counter of the current recording.
+
+    Args:
+        name: Counter name
+        amount: Value to add
+    """
+    if _current is not None:
+        _current.counts[name] = _current.counts.get(name, 0) + amount
+
+
+def counting_collection(col: Any) -> Any:
+    """
+    Wrap a collection so the calls made to it are counted.
+
+    Args:
+        col: Collection to wrap
+
+    Returns:
+        The collection itself when nothing is being recorded, otherwise a
+        proxy that counts calls on col.decks, col.db and col.sched
+    """
+    if _current is None or col is None:
+        return col
+    return _CountingProxy(col, "col", _current)
+
+
+@contextmanager
+def record(profile_dir: Optional[str] = None) -> Iterator[Timings]:
+    """
+    Record the timings of a run.
+
+    Args:
+        profile_dir: If given, also run cProfile and write the stats to a
+            .prof file in this folder
+
+    Yields:
+        Timings: Filled in while the block runs; complete afterwards
+    """
+    global _current, _last
+
+    timings = Timings()
+    previous = _current
+    _current = timings
+    profiler = cProfile.Profile() if profile_dir else None
+
+    try:
+        if profiler:
+            profiler.enable()
+        yield timings
+    finally:
+        if profiler:
+            profiler.disable()
+        timings.total = time.perf_counter() - timings.started
+        _current = previous
+
+        if profiler:
+            stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+            profile_file = os.path.join(profile_dir, f"check-{stamp}.prof")
+            try:
+                os.makedirs(profile_dir, exist_ok=True)
+                profiler.dump_stats(profile_file)
+                timings.profile_file = profile_file
+            except OSError as e:
+                print(f"Weekend Blocker: Failed to write profile: {e}")
+
+        _last = timings.as_dict()
+
+
+def get_import_timings() -> Dict[str, float]:
+    """
+    Get what loading the addon itself cost.
+
+    Returns:
+        dict: "import_ms", the time spent importing the package at
+            startup, and "load_ms", the time spent importing the rest of
+            the addon on first use (only once that happened)
+    """
+    package = sys.modules.get(__package__)
+    result = {"import_ms": round(getattr(package, "import_seconds", 0.0) * 1000, 2)}
+
+    load_seconds = getattr(package, "load_seconds", None)
+    if load_seconds is not None:
+        result["load_ms"] = round(load_seconds * 1000, 2)
+
+    return result
+
+
+def get_last_timings() -> Optional[dict]:
+    """
+    Get the timings of the last recorded run in this session.
+
+    Returns:
+        dict from Timings.as_dict(), or None if nothing was recorded
+    """
+    return _last
@@ -0,0 +1,92 @@
+"""
+Change plans for Weekend Blocker addon.
+A plan lists what a check would change, as plain records, so the same
+object can be previewed (status dialog, dry runs) and then applied
+without scanning the collection again.
+"""
+
+from typing import List, NamedTuple, Optional, Tuple
+
+from .translations import get_translation as tr
+
+# Kinds of limit change
+CONFIG = "config"
+DECK = "deck"
+TODAY = "today"  # "today only" deck limit
+
+
+class LimitChange(NamedTuple):
+    """One new-card limit to change."""
+
+    kind: str
+    id: int
+    name: str
+    old: Optional[int]
+    new: int
+    # True when the new value comes from the backup of the original limits
+    restore: bool = False
+    # Preset or deck dict the change was planned from, written back as is
+    source: Optional[dict] = None
+
+    @property
+    def key(self) -> str:
+        """Backup key of the limit ("config_<id>" / "deck_<id>")."""
+        return f"{self.kind}_{self.id}"
+
+    def describe(self) -> str:
+        """
+        Describe the change for the user.
+
+        Returns:
+            str: Message such as "Config 'Default': 20 → 0"
+        """
+        if self.kind == TODAY:
+            return f"Deck '{self.name}': {self.new} ({tr('status_today')})"
+
+        label = "Config" if self.kind == CONFIG else "Deck"
+        return f"{label} '{self.name}': {self.old} → {self.new}"
+
+
+class CheckPlan(NamedTuple):
+    """Everything a check would do to a collection."""
+
+    target: str
+    today_only: bool
+    limits: Tuple[LimitChange, ...] = ()
+    # Card ids to bury / candidates to unbury
+    bury: Tuple[int, ...] = ()
+    unbury: Tuple[int, ...] = ()
+    has_backup: bool = False
+    # Drop the backup once the limits are restored
+    clear_backup: bool = False
+
+    def messages(self) -> List[str]:
+        """
+        Describe the limit changes for the user.
+
+        Returns:
+            List of messages, one per change
+        """
+        return [change.describe() for change in self.limits]
+
+    def records(self) -> List[dict]:
+        """
+        Get the limit changes as JSON-serializable records.
+
+        Returns:
+            List of dicts with "kind", "id", "name", "old" and "new"
+        """
+        return [
+            {"kind": change.kind, "id": change.id, "name": change.name,
+             "old": change.old, "new": change.new}
+            for change in self.limits
+        ]
+
+    def is_empty(self) -> bool:
+        """
+        Check if applying the plan would change anything.
+
+        Returns:
+            bool: True if there is nothing to write, bury or unbury
+        """
+        return not (self.limits or self.bury or self.unbury or self.clear_backup)
@@ -0,0 +1,250 @@
+"""
+Per-deck and per-preset rules for Weekend Blocker addon.
+Pure Python: the rules from the config are compiled once into a prefix
+trie over the "::" deck hierarchy, so resolving the rule of every deck
+is a single pass instead of matching every deck against every rule.
+"""
+
+import datetime
+import fnmatch
+import json
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional, Pattern, Tuple
+
+_GLOB_CHARS = frozenset("*?[")
+
+# (config key, compiled rules) of the last compile_rules() call
+_cache: Optional[Tuple[str, "CompiledRules"]] = None
+
+
+class DeckRule(NamedTuple):
+    """Blocking rule resolved for a deck or preset."""
+
+    blocked_weekdays: frozenset
+    source: str
+
+    def blocks(self, date: datetime.date) -> bool:
+        """
+        Check if the rule blocks new cards on a date.
+
+        Args:
+            date: Date to check
+
+        Returns:
+            bool: True if new cards are blocked
+        """
+        return date.weekday() in self.blocked_weekdays
+
+
+class _Node:
+    """Trie node for one deck-name component."""
+
+    __slots__ = ("children", "globs", "rule", "order")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, "_Node"] = {}
+        self.globs: List[tuple] = []
+        self.rule: Optional[DeckRule] = None
+        self.order = 0
+
+
+class CompiledRules:
+    """
+    Deck and preset rules compiled for fast lookup.
+
+    Each entry of the "deck_rules" config option is one of:
+
+    - {"deck": "Languages::*", "blocked_weekdays": []}: a deck-name glob;
+      the rule applies to the matching decks and their subdecks
+    - {"regex": "Medical.*", "blocked_weekdays": [4, 5, 6]}: a regular
+      expression matched against the full deck name; invalid expressions
+      are skipped
+    - {"preset": 1699999999999, "blocked_weekdays": []}: a preset id
+
+    Decks without a rule of their own inherit the rule of their parent;
+    top-level decks fall back to the global blocked weekdays. Deck names
+    are matched case-insensitively, like in Anki.
+    """
+
+    def __init__(self, rules: Iterable[dict], default_weekdays: Iterable[int]) -> None:
+        default = frozenset(default_weekdays)
+        self.default = DeckRule(default, "default")
+        self.presets: Dict[int, DeckRule] = {}
+        self._root = _Node()
+        self._patterns: List[Tuple[Pattern, DeckRule]] = []
+
+        for order, rule in enumerate(rules):
+            weekdays = rule.get("blocked_weekdays")
+            weekdays = default if weekdays is None else frozenset(int(day) for day in weekdays)
+
+            if "preset" in rule:
+                self.presets.setdefault(
+                    int(rule["preset"]), DeckRule(weekdays, f"preset {rule['preset']}")
+                )
+            elif "regex" in rule:
+                try:
+                    pattern = re.compile(rule["regex"], re.IGNORECASE)
+                except re.error as e:
+                    print(f"Weekend Blocker: skipping invalid regex {rule['regex']!r}: {e}")
+                    continue
+                self._patterns.append((pattern, DeckRule(weekdays, f"regex {rule['regex']}")))
+            elif "deck" in rule:
+                self._insert(rule["deck"], DeckRule(weekdays, f"deck {rule['deck']}"), order)
+
+        self._regex, self._regex_rules = self._combine(self._patterns)
+
+    @staticmethod
+    def _combine(
+        patterns: List[Tuple[Pattern, DeckRule]]
+    ) -> Tuple[Optional[Pattern], Dict[str, DeckRule]]:
+        """
+        Join the regex rules into one alternation, one named group per rule.
+
+        Expressions with groups of their own (whose names or numbers would
+        clash once joined) or with inline flags are left to be matched one
+        by one instead.
+
+        Returns:
+            (combined pattern, rule by group name), or (None, {})
+        """
+        if not patterns or any(pattern.groups for pattern, _ in patterns):
+            return None, {}
+
+        rules = {f"r{index}": rule for index, (_, rule) in enumerate(patterns)}
+        parts = (f"(?P<r{index}>{pattern.pattern})" for index, (pattern, _) in enumerate(patterns))
+
+        try:
+            return re.compile("|".join(parts), re.IGNORECASE), rules
+        except re.error:
+            return None, {}
+
+    def _match_regex(self, name: str) -> Optional[DeckRule]:
+        """Get the rule of the first regex matching a deck name, if any."""
+        if self._regex is not None:
+            match = self._regex.fullmatch(name)
+            return self._regex_rules[match.lastgroup] if match else None
+
+        for pattern, rule in self._patterns:
+            if pattern.fullmatch(name):
+                return rule
+
+        return None
+
+    def _insert(self, pattern: str, rule: DeckRule, order: int) -> None:
+        """Add a deck-name pattern to the trie."""
+        node = self._root
+
+        for component in pattern.casefold().split("::"):
+            if _GLOB_CHARS.intersection(component):
+                for glob, child in node.globs:
+                    if glob == component:
+                        break
+                else:
+                    child = _Node()
+                    node.globs.append((component, child))
+            else:
+                child = node.children.setdefault(component, _Node())
+            node = child
+
+        # The first rule given for a pattern wins
+        if node.rule is None:
+            node.rule = rule
+            node.order = order
+
+    def _nodes(self, name: str, memo: Dict[str, List[_Node]]) -> List[_Node]:
+        """Get the trie nodes a deck name reaches, reusing its parent's."""
+        if name in memo:
+            return memo[name]
+
+        parent, _, leaf = name.rpartition("::")
+        parents = self._nodes(parent, memo) if parent else [self._root]
+        nodes = []
+
+        for node in parents:
+            child = node.children.get(leaf)
+            if child is not None:
+                nodes.append(child)
+            for glob, glob_child in node.globs:
+                if fnmatch.fnmatchcase(leaf, glob):
+                    nodes.append(glob_child)
+
+        memo[name] = nodes
+        return nodes
+
+    def resolve_all(self, deck_names: Iterable[str]) -> Dict[str, DeckRule]:
+        """
+        Resolve the rule of every deck.
+
+        Each deck reuses the trie position and rule of its parent, so the
+        whole tree is resolved in one linear pass.
+
+        Args:
+            deck_names: Full deck names ("Parent::Child")
+
+        Returns:
+            dict: Mapping of deck name to its rule
+        """
+        node_memo: Dict[str, List[_Node]] = {}
+        rule_memo: Dict[str, DeckRule] = {}
+
+        def resolve(name: str) -> DeckRule:
+            key = name.casefold()
+            if key in rule_memo:
+                return rule_memo[key]
+
+            own = [node for node in self._nodes(key, node_memo) if node.rule is not None]
+
+            if own:
+                rule = min(own, key=lambda node: node.order).rule
+            elif self._patterns and (regex_rule := self._match_regex(name)) is not None:
+                rule = regex_rule
+            elif "::" in name:
+                rule = resolve(name.rpartition("::")[0])
+            else:
+                rule = self.default
+
+            rule_memo[key] = rule
+            return rule
+
+        return {name: resolve(name) for name in deck_names}
+
+    def preset_rule(self, config_id: int) -> Optional[DeckRule]:
+        """
+        Get the rule set for a preset, if any.
+
+        Args:
+            config_id: Deck config (preset) id
+
+        Returns:
+            DeckRule or None
+        """
+        return self.presets.get(config_id)
+
+
+def compile_rules(config: dict) -> Optional[CompiledRules]:
+    """
+    Compile the "deck_rules" config option.
+
+    The result is cached and only recompiled when the rules or the
+    global blocked weekdays change.
+
+    Args:
+        config: Addon configuration
+
+    Returns:
+        CompiledRules, or None if no rules are configured
+    """
+    global _cache
+
+    rules = config.get("deck_rules") or []
+    if not rules:
+        return None
+
+    weekdays = config.get("blocked_weekdays")
+    weekdays = (5, 6) if weekdays is None else weekdays
+    key = json.dumps([rules, weekdays], sort_keys=True)
+
+    if _cache is None or _cache[0] != key:
+        _cache = (key, CompiledRules(rules, weekdays))
+
+    return _cache[1]
@@ -0,0 +1,161 @@
+"""
+Schedule decisions for Weekend Blocker addon.
+Pure Python with no Anki or Qt imports: given a date and the rules,
+decides whether new cards should be blocked, restored or paused.
+"""
+
+import datetime
+from typing import Iterable, List, NamedTuple, Optional
+
+from .calendar_index import CalendarIndex, compile_calendar
+
+BLOCK = "block"
+RESTORE = "restore"
+PAUSE = "pause"
+
+# Saturday=5, Sunday=6
+DEFAULT_BLOCKED_WEEKDAYS = frozenset((5, 6))
+
+
+class ScheduleRules(NamedTuple):
+    """Rules the decision is based on."""
+
+    blocked_weekdays: frozenset = DEFAULT_BLOCKED_WEEKDAYS
+    manual_pause: bool = False
+    # Holidays and other blocked dates, on top of the weekdays
+    calendar: Optional[CalendarIndex] = None
+
+    @classmethod
+    def from_config(cls, config: dict) -> "ScheduleRules":
+        """
+        Build the rules from the addon configuration.
+
+        Args:
+            config: Configuration dictionary
+
+        Returns:
+            ScheduleRules: Rules for the decision
+        """
+        weekdays = config.get("blocked_weekdays")
+        if weekdays is None:
+            weekdays = DEFAULT_BLOCKED_WEEKDAYS
+
+        return cls(
+            blocked_weekdays=frozenset(int(day) for day in weekdays),
+            manual_pause=bool(config.get("manual_pause", False)),
+            calendar=compile_calendar(config),
+        )
+
+    def weekday_table(self) -> List[str]:
+        """
+        Get the decision for each weekday (index 0 = Monday).
+
+        Blocked dates from the calendar are not included.
+
+        Returns:
+            List of 7 targets
+        """
+        if self.manual_pause:
+            return [PAUSE] * 7
+        return [BLOCK if day in self.blocked_weekdays else RESTORE for day in range(7)]
+
+
+def is_blocked_day(date: datetime.date, rules: ScheduleRules = ScheduleRules()) -> bool:
+    """
+    Check if new cards are blocked on a date by the weekday or calendar rules.
+
+    Args:
+        date: Date to check
+        rules: Rules to apply (defaults to Saturday and Sunday)
+
+    Returns:
+        bool: True if the date is blocked
+    """
+    if date.weekday() in rules.blocked_weekdays:
+        return True
+    return rules.calendar is not None and rules.calendar.is_blocked(date)
+
+
+def decide(date: datetime.date, rules: ScheduleRules = ScheduleRules()) -> str:
+    """
+    Decide the target state for one date.
+
+    Args:
+        date: Date to decide for
+        rules: Rules to apply
+
+    Returns:
+        str: BLOCK, RESTORE or PAUSE
+    """
+    if rules.manual_pause:
+        return PAUSE
+    return BLOCK if is_blocked_day(date, rules) else RESTORE
+
+
+def decide_many(
+    dates: Iterable[datetime.date],
+    rules: ScheduleRules = ScheduleRules(),
+) -> List[str]:
+    """
+    Decide the target state for many dates in one call.
+
+    The rules are turned into a 7-entry weekday table once, so each date
+    costs a single table lookup (plus a bit test with calendar rules).
+
+    Args:
+        dates: Dates to decide for
+        rules: Rules to apply
+
+    Returns:
+        List of targets, in the order of the dates
+    """
+    table = rules.weekday_table()
+    calendar = rules.calendar
+
+    if calendar is None or rules.manual_pause:
+        return [table[date.weekday()] for date in dates]
+
+    return [BLOCK if calendar.is_blocked(date) else table[date.weekday()] for date in dates]
+
+
+def decide_range(
+    start: datetime.date,
+    days: int,
+    rules: ScheduleRules = ScheduleRules(),
+) -> List[str]:
+    """
+    Decide the target state for consecutive dates.
+
+    Args:
+        start: First date
+        days: Number of dates
+        rules: Rules to apply
+
+    Returns:
+        List of targets, one per day starting at start
+    """
+    if rules.calendar is not None and not rules.manual_pause:
+        return decide_many(
+            (start + datetime.timedelta(days=offset) for offset in range(days)), rules
+        )
+
+    table = rules.weekday_table()
+    first = start.weekday()
+    return [table[(first + offset) % 7] for offset in range(days)]
+
+
+def decide_year(year: int, rules: ScheduleRules = ScheduleRules()) -> List[str]:
+    """
+    Decide the target state for every day of a year.
+
+    Args:
+        year: Calendar year
+        rules: Rules to apply
+
+    Returns:
+        List of targets, index 0 = January 1st
+    """
+    start = datetime.date(year, 1, 1)
+    days = (datetime.date(year + 1, 1, 1) - start).days
+    return decide_range(start, days, rules)
+
@@ -0,0 +1,94 @@
+"""
+Status model for Weekend Blocker addon.
+A snapshot of what the status dialog shows (current and backed-up
+limits, buried cards, last run, pending changes), built once per state
+change so the dialog can be reopened and sorted without scanning the
+collection again.
+"""
+
+import datetime
+from typing import List, NamedTuple, Optional, Tuple
+
+from .plan import CONFIG, CheckPlan
+from .translations import get_translation as tr
+from .utils import get_day_name
+
+
+class LimitRow(NamedTuple):
+    """New-card limit of a preset or of a deck with its own limit."""
+
+    kind: str
+    id: int
+    name: str
+    current: int
+    # Value in the backup of the original limits, None if not backed up
+    backup: Optional[int]
+
+    @property
+    def changed(self) -> bool:
+        """True if the limit differs from its backup."""
+        return self.backup is not None and self.current != self.backup
+
+
+class StatusModel(NamedTuple):
+    """State of the addon and of the collection's limits."""
+
+    today: datetime.date
+    weekend: bool
+    enabled: bool
+    manual_pause: bool
+    last_run: Optional[str]
+    # Cards buried by the addon and not yet unburied
+    buried: int
+    limits: Tuple[LimitRow, ...] = ()
+    pending: Optional[CheckPlan] = None
+
+    def summary_lines(self) -> List[str]:
+        """
+        Describe the state for the user (without the limits table).
+
+        Returns:
+            List of lines
+        """
+        def flag(value: bool) -> str:
+            return "✅" if value else "❌"
+
+        last_run = self.last_run[:16].replace("T", " ") if self.last_run else tr("status_never")
+        changed = sum(1 for row in self.limits if row.changed)
+
+        lines = [
+            tr("status_title"),
+            "",
+            f"{tr('status_today')}: {get_day_name(self.today)}",
+            f"{tr('status_weekend')}: {flag(self.weekend)}",
+            f"{tr('status_enabled')}: {flag(self.enabled)}",
+            f"{tr('status_manual_pause')}: {flag(self.manual_pause)}",
+            f"{tr('status_last_run')}: {last_run}",
+            f"{tr('status_buried')}: {self.buried}",
+            f"{tr('status_changed_limits')}: {changed} / {len(self.limits)}",
+        ]
+
+        # What the next check would change, from the same plan the check applies
+        if self.pending is not None and self.enabled:
+            lines += ["", f"{tr('status_pending')}:"]
+
+            if self.pending.bury:
+                lines.append(f"  • {tr('weekend_buried')}: {len(self.pending.bury)}")
+            lines += [f"  • {change}" for change in self.pending.messages()]
+            if not self.pending.bury and not self.pending.limits:
+                lines.append(f"  • {tr('status_nothing_pending')}")
+
+        return lines
+
+
+def kind_name(kind: str) -> str:
+    """
+    Get the user-facing name of a limit kind.
+
+    Args:
+        kind: CONFIG or DECK
+
+    Returns:
+        str: "Preset" or "Deck" in the user's language
+    """
+    return tr("status_preset") if kind == CONFIG else tr("status_deck")
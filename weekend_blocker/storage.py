@@ -0,0 +1,506 @@
+"""
+Sidecar storage for Weekend Blocker addon.
+Keeps per-collection state in the addon's user_files folder,
+outside the add-on config. The backup of the original limits has its
+own small SQLite database per collection, so single limits can be
+updated without rewriting the whole backup.
+"""
+
+import hashlib
+import json
+import os
+import pathlib
+import sqlite3
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+USER_FILES_DIR = os.path.join(os.path.dirname(__file__), "user_files")
+STATE_DIR = os.path.join(USER_FILES_DIR, "state")
+
+# Shared state file used by earlier versions, read for migration only
+LEGACY_STATE_FILE = os.path.join(USER_FILES_DIR, "state.json")
+
+# Version of the limits database schema (stored in PRAGMA user_version)
+LIMITS_SCHEMA_VERSION = 2
+
+# Number of limit snapshots kept per collection
+MAX_SNAPSHOTS = 20
+
+# Backup keys are "<kind>_<id>"; the database stores the kind as a number
+LIMIT_KINDS = {"config": 0, "deck": 1}
+_KIND_NAMES = {number: name for name, number in LIMIT_KINDS.items()}
+
+
+class LimitsReadError(Exception):
+    """The backup of a collection's limits exists but could not be read."""
+
+
+def encode_ids(ids: Iterable[int]) -> List[int]:
+    """
+    Delta-encode a set of ids.
+
+    Card ids are millisecond timestamps, so the sorted gaps between them
+    are much shorter than the ids themselves.
+
+    Args:
+        ids: Ids to encode (order and duplicates don't matter)
+
+    Returns:
+        List of deltas, the first one being the smallest id
+    """
+    deltas = []
+    previous = 0
+
+    for item_id in sorted(set(ids)):
+        deltas.append(item_id - previous)
+        previous = item_id
+
+    return deltas
+
+
+def decode_ids(deltas: Iterable[int]) -> List[int]:
+    """
+    Decode a list produced by encode_ids().
+
+    Args:
+        deltas: Delta-encoded ids
+
+    Returns:
+        List of ids in ascending order
+    """
+    ids = []
+    current = 0
+
+    for delta in deltas:
+        current += delta
+        ids.append(current)
+
+    return ids
+
+
+def _state_key(col_path: str) -> str:
+    """Get the file name stem used for one collection."""
+    return hashlib.sha1(os.path.abspath(col_path).encode("utf-8")).hexdigest()[:16]
+
+
+def _state_file(col_path: str) -> str:
+    """Get the path of the state file of one collection."""
+    return os.path.join(STATE_DIR, f"{_state_key(col_path)}.json")
+
+
+def _load_legacy_state(col_path: str) -> dict:
+    """Read a collection's state from the former shared state.json."""
+    try:
+        with open(LEGACY_STATE_FILE, encoding="utf-8") as f:
+            return json.load(f).get(col_path, {})
+    except (OSError, ValueError):
+        return {}
+
+
+def load_collection_state(col_path: str) -> dict:
+    """
+    Get the stored state of one collection.
+
+    Args:
+        col_path: Path of the collection file
+
+    Returns:
+        dict: State dictionary (empty if nothing was stored yet)
+    """
+    try:
+        with open(_state_file(col_path), encoding="utf-8") as f:
+            return json.load(f).get("state", {})
+    except FileNotFoundError:
+        return _load_legacy_state(col_path)
+    except (OSError, ValueError) as e:
+        print(f"Weekend Blocker: Failed to read state: {e}")
+        return {}
+
+
+def save_collection_state(col_path: str, state: dict) -> None:
+    """
+    Store the state of one collection.
+
+    Each collection has its own file, so processes working on different
+    collections never write to the same file.
+
+    Args:
+        col_path: Path of the collection file
+        state: State dictionary to save
+    """
+    state_file = _state_file(col_path)
+    tmp_file = f"{state_file}.{os.getpid()}.tmp"
+
+    try:
+        os.makedirs(STATE_DIR, exist_ok=True)
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump({"collection": col_path, "state": state}, f, separators=(",", ":"))
+        os.replace(tmp_file, state_file)
+    except OSError as e:
+        print(f"Weekend Blocker: Failed to write state: {e}")
+
+
+def get_buried_ids(col_path: str) -> List[int]:
+    """
+    Get the ids of the cards the addon buried in a collection.
+
+    Args:
+        col_path: Path of the collection file
+
+    Returns:
+        List of card ids
+    """
+    return decode_ids(load_collection_state(col_path).get("buried", []))
+
+
+def set_buried_ids(col_path: str, card_ids: Iterable[int]) -> None:
+    """
+    Replace the recorded set of cards the addon buried in a collection.
+
+    Args:
+        col_path: Path of the collection file
+        card_ids: Card ids to record (an empty iterable clears the record)
+    """
+    state = load_collection_state(col_path)
+    state["buried"] = encode_ids(card_ids)
+    save_collection_state(col_path, state)
+
+
+def get_fingerprint(col_path: str) -> str:
+    """
+    Get the fingerprint of the state the addon last applied to a collection.
+
+    Args:
+        col_path: Path of the collection file
+
+    Returns:
+        str: Stored fingerprint, or an empty string if there is none
+    """
+    return load_collection_state(col_path).get("fingerprint", "")
+
+
+def set_fingerprint(col_path: str, fingerprint: str) -> None:
+    """
+    Store the fingerprint of the state just applied to a collection.
+
+    Args:
+        col_path: Path of the collection file
+        fingerprint: Value returned by core.get_collection_fingerprint()
+    """
+    state = load_collection_state(col_path)
+    state["fingerprint"] = fingerprint
+    save_collection_state(col_path, state)
+
+
+def _split_key(key: str) -> Tuple[int, int]:
+    """Turn a "config_<id>" / "deck_<id>" key into (kind, id)."""
+    kind, _, item_id = key.partition("_")
+    return LIMIT_KINDS[kind], int(item_id)
+
+
+def _migrate_limits_db(db: sqlite3.Connection, col_path: str) -> None:
+    """Create or upgrade the limits database schema."""
+    version = db.execute("pragma user_version").fetchone()[0]
+
+    if version < 1:
+        db.execute(
+            "create table if not exists limits ("
+            "kind integer not null, id integer not null, per_day integer not null, "
+            "primary key (kind, id)) without rowid"
+        )
+        db.execute(
+            "create table if not exists info (name text primary key, value text) without rowid"
+        )
+
+        # Earlier versions kept the backup in the JSON state file
+        state = load_collection_state(col_path)
+        limits = state.pop("original_limits", None)
+
+        if limits is not None:
+            db.executemany(
+                "insert or replace into limits values (?, ?, ?)",
+                [(*_split_key(key), value) for key, value in limits.items()],
+            )
+            db.execute("insert or replace into info values ('saved', '1')")
+            save_collection_state(col_path, state)
+
+    if version < 2:
+        db.execute(
+            "create table if not exists snapshots ("
+            "id integer primary key, created text not null, label text not null)"
+        )
+        # Each snapshot only holds the limits that its write overwrote
+        db.execute(
+            "create table if not exists snapshot_limits ("
+            "snapshot integer not null, kind integer not null, id integer not null, "
+            "per_day integer not null, primary key (snapshot, kind, id)) without rowid"
+        )
+        db.execute(
+            "create index if not exists snapshot_limits_item "
+            "on snapshot_limits (kind, id, snapshot)"
+        )
+
+    db.execute(f"pragma user_version = {LIMITS_SCHEMA_VERSION}")
+
+
+def _limits_db_file(col_path: str) -> str:
+    """Get the path of the limits database of one collection."""
+    return os.path.join(STATE_DIR, f"{_state_key(col_path)}.db")
+
+
+@contextmanager
+def _limits_db(col_path: str) -> Iterator[sqlite3.Connection]:
+    """Open the limits database of one collection, in one transaction."""
+    os.makedirs(STATE_DIR, exist_ok=True)
+    db = sqlite3.connect(_limits_db_file(col_path))
+
+    try:
+        with db:
+            if db.execute("pragma user_version").fetchone()[0] < LIMITS_SCHEMA_VERSION:
+                _migrate_limits_db(db, col_path)
+            yield db
+    finally:
+        db.close()
+
+
+def _read_limits_read_only(col_path: str) -> Optional[Dict[str, int]]:
+    """get_original_limits() without creating or upgrading anything."""
+    db_file = _limits_db_file(col_path)
+
+    if os.path.exists(db_file):
+        uri = f"{pathlib.Path(os.path.abspath(db_file)).as_uri()}?mode=ro"
+        db = sqlite3.connect(uri, uri=True)
+
+        try:
+            # Version 1 already has the limits; later ones only add tables
+            if db.execute("pragma user_version").fetchone()[0] >= 1:
+                if not db.execute("select 1 from info where name = 'saved'").fetchone():
+                    return None
+
+                return {
+                    f"{_KIND_NAMES[kind]}_{item_id}": per_day
+                    for kind, item_id, per_day in db.execute("select kind, id, per_day from limits")
+                }
+        finally:
+            db.close()
+
+    # Not moved to the database yet
+    return load_collection_state(col_path).get("original_limits")
+
+
+def get_original_limits(col_path: str, read_only: bool = False) -> Optional[Dict[str, int]]:
+    """
+    Get the backup of the original new-card limits of a collection.
+
+    Args:
+        col_path: Path of the collection file
+        read_only: Don't create or upgrade the database (for dry runs); a
+            backup in the state file of earlier versions is read in place
+
+    Returns:
+        dict: Limits keyed "config_<id>" / "deck_<id>", or None if no
+            backup was ever stored for this collection
+
+    Raises:
+        LimitsReadError: If the database could not be read; this must not
+            be mistaken for a missing backup, or the blocked limits would
+            be taken as the originals
+    """
+    try:
+        if read_only:
+            return _read_limits_read_only(col_path)
+
+        with _limits_db(col_path) as db:
+            if not db.execute("select 1 from info where name = 'saved'").fetchone():
+                return None
+
+            return {
+                f"{_KIND_NAMES[kind]}_{item_id}": per_day
+                for kind, item_id, per_day in db.execute("select kind, id, per_day from limits")
+            }
+    except (OSError, sqlite3.Error) as e:
+        raise LimitsReadError(f"Failed to read limits: {e}") from e
+
+
+def set_original_limits(col_path: str, limits: Dict[str, int]) -> None:
+    """
+    Replace the backup of the original new-card limits of a collection.
+
+    Args:
+        col_path: Path of the collection file
+        limits: Limits keyed "config_<id>" / "deck_<id>" (empty to clear)
+    """
+    try:
+        with _limits_db(col_path) as db:
+            db.execute("delete from limits")
+            db.executemany(
+                "insert into limits values (?, ?, ?)",
+                [(*_split_key(key), value) for key, value in limits.items()],
+            )
+            db.execute("insert or replace into info values ('saved', '1')")
+    except (OSError, sqlite3.Error) as e:
+        print(f"Weekend Blocker: Failed to write limits: {e}")
+
+
+def update_original_limits(col_path: str, limits: Dict[str, int]) -> None:
+    """
+    Change single entries of the backup, leaving the others untouched.
+
+    Args:
+        col_path: Path of the collection file
+        limits: Limits to set, keyed "config_<id>" / "deck_<id>"
+    """
+    try:
+        with _limits_db(col_path) as db:
+            db.executemany(
+                "insert or replace into limits values (?, ?, ?)",
+                [(*_split_key(key), value) for key, value in limits.items()],
+            )
+    except (OSError, sqlite3.Error) as e:
+        print(f"Weekend Blocker: Failed to write limits: {e}")
+
+
+def add_snapshot(col_path: str, created: str, label: str, limits: Dict[str, int]) -> int:
+    """
+    Record the limits a write is about to overwrite.
+
+    A snapshot only stores the rows that change, so its size depends on
+    the number of changes, not on the number of decks. The oldest
+    snapshots are dropped beyond MAX_SNAPSHOTS.
+
+    Args:
+        col_path: Path of the collection file
+        created: Timestamp of the snapshot
+        label: Description of the write
+        limits: Current values of the limits about to change, keyed
+            "config_<id>" / "deck_<id>"
+
+    Returns:
+        int: Id of the new snapshot (0 if it could not be stored)
+    """
+    try:
+        with _limits_db(col_path) as db:
+            snapshot_id = db.execute(
+                "insert into snapshots (created, label) values (?, ?)", (created, label)
+            ).lastrowid
+            db.executemany(
+                "insert into snapshot_limits values (?, ?, ?, ?)",
+                [(snapshot_id, *_split_key(key), value) for key, value in limits.items()],
+            )
+
+            oldest = snapshot_id - MAX_SNAPSHOTS
+            db.execute("delete from snapshot_limits where snapshot <= ?", (oldest,))
+            db.execute("delete from snapshots where id <= ?", (oldest,))
+
+            return snapshot_id
+    except (OSError, sqlite3.Error) as e:
+        print(f"Weekend Blocker: Failed to write snapshot: {e}")
+        return 0
+
+
+def list_snapshots(col_path: str) -> List[dict]:
+    """
+    List the stored snapshots of a collection, newest first.
+
+    Args:
+        col_path: Path of the collection file
+
+    Returns:
+        List of dicts with "id", "created", "label" and "changes"
+    """
+    try:
+        with _limits_db(col_path) as db:
+            rows = db.execute(
+                "select s.id, s.created, s.label, count(l.snapshot) from snapshots s "
+                "left join snapshot_limits l on l.snapshot = s.id "
+                "group by s.id order by s.id desc"
+            ).fetchall()
+    except (OSError, sqlite3.Error) as e:
+        print(f"Weekend Blocker: Failed to read snapshots: {e}")
+        return []
+
+    return [
+        {"id": snapshot_id, "created": created, "label": label, "changes": changes}
+        for snapshot_id, created, label, changes in rows
+    ]
+
+
+def get_snapshot_limits(col_path: str, snapshot_id: int) -> Dict[str, int]:
+    """
+    Get the limits as they were just before a snapshot's write.
+
+    For every limit changed by that write or a later one, this is the
+    value stored by the earliest such snapshot.
+
+    Args:
+        col_path: Path of the collection file
+        snapshot_id: Id returned by add_snapshot()
+
+    Returns:
+        dict: Limits keyed "config_<id>" / "deck_<id>"
+    """
+    try:
+        with _limits_db(col_path) as db:
+            rows = db.execute(
+                "select kind, id, per_day from snapshot_limits l "
+                "where snapshot = (select min(snapshot) from snapshot_limits "
+                "where kind = l.kind and id = l.id and snapshot >= ?)",
+                (snapshot_id,),
+            ).fetchall()
+    except (OSError, sqlite3.Error) as e:
+        print(f"Weekend Blocker: Failed to read snapshot: {e}")
+        return {}
+
+    return {f"{_KIND_NAMES[kind]}_{item_id}": per_day for kind, item_id, per_day in rows}
+
+
+def get_applied_limits(col_path: str) -> Dict[str, int]:
+    """
+    Get the limits the addon itself last wrote to a collection.
+
+    Args:
+        col_path: Path of the collection file
+
+    Returns:
+        dict: Limits keyed "config_<id>" / "deck_<id>"
+    """
+    return load_collection_state(col_path).get("applied_limits", {})
+
+
+def set_applied_limits(col_path: str, limits: Dict[str, int]) -> None:
+    """
+    Replace the record of the limits the addon wrote to a collection.
+
+    Args:
+        col_path: Path of the collection file
+        limits: Limits keyed "config_<id>" / "deck_<id>"
+    """
+    state = load_collection_state(col_path)
+    state["applied_limits"] = limits
+    save_collection_state(col_path, state)
+
+
+def get_limits_watermark(col_path: str) -> Optional[int]:
+    """
+    Get the modification time up to which limit changes were tracked.
+
+    Args:
+        col_path: Path of the collection file
+
+    Returns:
+        int: Modification time in seconds, or None if never tracked
+    """
+    return load_collection_state(col_path).get("limits_watermark")
+
+
+def set_limits_watermark(col_path: str, mtime: int) -> None:
+    """
+    Store the modification time up to which limit changes were tracked.
+
+    Args:
+        col_path: Path of the collection file
+        mtime: Latest deck/preset modification time seen, in seconds
+    """
+    state = load_collection_state(col_path)
+    state["limits_watermark"] = mtime
+    save_collection_state(col_path, state)
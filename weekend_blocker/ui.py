@@ -3,93 +3,160 @@ UI components for Weekend Blocker addon.
 Creates menus and dialogs for user interaction.
 """
 
-from typing import Callable, Optional
+import json
+import time
+from typing import Callable, Dict, Iterable, List, Optional
 
 from aqt import mw
-from aqt.qt import QAction, QMenu
+from aqt.operations import CollectionOp
+from aqt.qt import (
+    QAbstractItemView,
+    QAbstractTableModel,
+    QAction,
+    QComboBox,
+    QDialog,
+    QFont,
+    QHBoxLayout,
+    QHeaderView,
+    QLabel,
+    QMenu,
+    QModelIndex,
+    QPushButton,
+    QSpinBox,
+    Qt,
+    QTableView,
+    QTableWidget,
+    QTableWidgetItem,
+    QTimer,
+    QVBoxLayout,
+)
 from aqt.utils import askUser, showInfo
 
 from .core import (
+    OpResult,
     get_status_info,
+    get_status_model,
     pause_all_new_cards,
     restore_weekday_limits,
     resume_all_new_cards,
+    rollback_to_snapshot,
+    run_as_op,
     run_automatic_check,
 )
-from .utils import get_addon_config, save_addon_config, show_info, show_tooltip
+from .history import get_event, query_history
+from .status import LimitRow, kind_name
+from .storage import list_snapshots
+from .utils import (
+    get_action_log,
+    get_addon_config,
+    save_addon_config,
+    show_result,
+    show_tooltip,
+)
 from .translations import get_translation as tr
 
 
 # Global variable to store the menu reference
 _weekend_blocker_menu: Optional[QMenu] = None
 
+# True while a check is running in the background
+_check_in_progress: bool = False
 
-def rebuild_menu() -> None:
-    """
-    Rebuild the menu to reflect current state.
-    Called after actions that change the config.
-    """
-    global _weekend_blocker_menu
+# Single-shot timer that re-runs the check when Anki's day rolls over
+_rollover_timer: Optional[QTimer] = None
 
-    if not mw or not _weekend_blocker_menu:
-        return
+# Seconds to wait after the rollover before checking, so the scheduler
+# already reports the new day
+ROLLOVER_MARGIN_SECONDS = 5
 
-    # Clear the existing menu
-    _weekend_blocker_menu.clear()
 
-    # Get current state to show relevant options
-    config = get_addon_config()
-    is_paused = config.get("manual_pause", False)
-    is_enabled = config.get("enabled", True)
+class MenuState:
+    """
+    The menu's persistent actions and the state they show.
+
+    The actions are created once; when "enabled" or "manual_pause"
+    change, update() toggles which of them are visible. Opening the menu
+    does no work at all.
+    """
+
+    def __init__(self) -> None:
+        self.enabled: Optional[bool] = None
+        self.paused: Optional[bool] = None
+        self.actions: Dict[str, QAction] = {}
 
-    # Rebuild menu actions
-    add_menu_action(_weekend_blocker_menu, tr("menu_status"), show_status_dialog)
-    _weekend_blocker_menu.addSeparator()
+    def update(self, config: dict) -> None:
+        """
+        Show the actions matching the config, if its state changed.
 
-    add_menu_action(_weekend_blocker_menu, tr("menu_run_check"), run_manual_check)
-    _weekend_blocker_menu.addSeparator()
+        Args:
+            config: Addon configuration
+        """
+        enabled = config.get("enabled", True)
+        paused = config.get("manual_pause", False)
 
-    # Show only the relevant pause/resume option
-    if is_paused:
-        add_menu_action(_weekend_blocker_menu, tr("menu_resume"), resume_new_cards_action)
-    else:
-        add_menu_action(_weekend_blocker_menu, tr("menu_pause"), pause_new_cards_action)
+        if enabled == self.enabled and paused == self.paused:
+            return
 
-    _weekend_blocker_menu.addSeparator()
+        self.enabled = enabled
+        self.paused = paused
 
-    add_menu_action(_weekend_blocker_menu, tr("menu_restore"), restore_settings_action)
+        if not self.actions:
+            return
 
-    # Show only the relevant enable/disable option
-    if is_enabled:
-        add_menu_action(_weekend_blocker_menu, tr("menu_disable"), disable_addon_action)
-    else:
-        add_menu_action(_weekend_blocker_menu, tr("menu_enable"), enable_addon_action)
+        # Show only the relevant pause/resume and enable/disable options
+        self.actions["pause"].setVisible(not paused)
+        self.actions["resume"].setVisible(paused)
+        self.actions["disable"].setVisible(enabled)
+        self.actions["enable"].setVisible(not enabled)
 
-    _weekend_blocker_menu.addSeparator()
 
-    add_menu_action(_weekend_blocker_menu, tr("menu_help"), show_help_dialog)
+_menu_state = MenuState()
 
 
-def create_menu() -> None:
+def build_menu(menu: QMenu) -> None:
     """
-    Create the Weekend Blocker menu in Anki's Tools menu.
+    Add the actions to the menu stub created at startup.
+    Called the first time the menu is about to be shown.
+
+    Args:
+        menu: The Weekend Blocker menu in Tools
     """
     global _weekend_blocker_menu
 
-    if not mw:
+    if not mw or _weekend_blocker_menu is not None:
         return
 
-    # Create main menu
-    _weekend_blocker_menu = QMenu("Weekend Blocker", mw)
+    _weekend_blocker_menu = menu
+
+    add_menu_action(menu, tr("menu_status"), show_status_dialog)
+    add_menu_action(menu, tr("menu_history"), show_history_dialog)
+    menu.addSeparator()
 
-    # Connect to aboutToShow signal to rebuild menu dynamically
-    _weekend_blocker_menu.aboutToShow.connect(rebuild_menu)
+    add_menu_action(menu, tr("menu_run_check"), run_manual_check)
+    menu.addSeparator()
 
-    # Initial build
-    rebuild_menu()
+    actions = _menu_state.actions
+    actions["pause"] = add_menu_action(menu, tr("menu_pause"), pause_new_cards_action)
+    actions["resume"] = add_menu_action(menu, tr("menu_resume"), resume_new_cards_action)
+    menu.addSeparator()
 
-    # Add menu to Tools
-    mw.form.menuTools.addMenu(_weekend_blocker_menu)
+    add_menu_action(menu, tr("menu_restore"), restore_settings_action)
+    actions["disable"] = add_menu_action(menu, tr("menu_disable"), disable_addon_action)
+    actions["enable"] = add_menu_action(menu, tr("menu_enable"), enable_addon_action)
+    menu.addSeparator()
+
+    add_menu_action(menu, tr("menu_help"), show_help_dialog)
+
+    # Apply the current state to the new actions
+    _menu_state.enabled = None
+    refresh_menu_state()
+
+
+def refresh_menu_state() -> None:
+    """
+    Update the menu after "enabled" or "manual_pause" may have changed.
+    """
+    _menu_state.update(get_addon_config())
 
 
 def add_menu_action(menu: QMenu, text: str, callback: Callable) -> QAction:
@@ -110,19 +177,354 @@ def add_menu_action(menu: QMenu, text: str, callback: Callable) -> QAction:
     return action
 
 
+class LimitsTableModel(QAbstractTableModel):
+    """
+    Limits of the status model, for a sortable QTableView.
+
+    The view only asks for the rows on screen, so the dialog stays fast
+    with thousands of presets and decks.
+    """
+
+    COLUMNS = ("status_column_type", "status_column_name", "status_current", "status_backup")
+
+    # Sort key of each column
+    SORT_KEYS = (
+        lambda row: row.kind,
+        lambda row: row.name.casefold(),
+        lambda row: row.current,
+        lambda row: -1 if row.backup is None else row.backup,
+    )
+
+    def __init__(self, parent=None) -> None:
+        super().__init__(parent)
+        self.rows: List[LimitRow] = []
+        self._headers = [tr(key) for key in self.COLUMNS]
+        self._bold = QFont()
+        self._bold.setBold(True)
+
+    def set_rows(self, rows: Iterable[LimitRow]) -> None:
+        """
+        Replace the rows shown.
+
+        Args:
+            rows: Limits from the status model
+        """
+        self.beginResetModel()
+        self.rows = list(rows)
+        self.endResetModel()
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+
+        row = self.rows[index.row()]
+        column = index.column()
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == 0:
+                return kind_name(row.kind)
+            if column == 1:
+                return row.name
+            if column == 2:
+                return str(row.current)
+            return "?" if row.backup is None else str(row.backup)
+
+        if role == Qt.ItemDataRole.TextAlignmentRole and column >= 2:
+            return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+
+        # Limits that differ from the backup stand out
+        if role == Qt.ItemDataRole.FontRole and row.changed:
+            return self._bold
+
+        return None
+
+    def headerData(
+        self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole
+    ):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self._headers[section]
+        return None
+
+    def sort(self, column: int, order: Qt.SortOrder = Qt.SortOrder.AscendingOrder) -> None:
+        self.layoutAboutToBeChanged.emit()
+        self.rows.sort(
+            key=self.SORT_KEYS[column], reverse=order == Qt.SortOrder.DescendingOrder
+        )
+        self.layoutChanged.emit()
+
+
 def show_status_dialog() -> None:
     """
-    Show a dialog with current status information.
+    Show a dialog with current status information, the new-card limits of
+    every preset and deck, and the limit snapshots.
+    """
+    dialog = QDialog(mw)
+    dialog.setWindowTitle(tr("status_title"))
+    dialog.resize(700, 700)
+
+    status_label = QLabel(dialog)
+    status_label.setWordWrap(True)
+
+    limits_model = LimitsTableModel(dialog)
+    limits_view = QTableView(dialog)
+    limits_view.setModel(limits_model)
+    limits_view.setSortingEnabled(True)
+    limits_view.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+    limits_view.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+    limits_view.verticalHeader().hide()
+    # Fixed row heights and column widths, so no row is measured
+    limits_view.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+    limits_header = limits_view.horizontalHeader()
+    limits_header.setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+    limits_view.sortByColumn(1, Qt.SortOrder.AscendingOrder)
+
+    table = QTableWidget(0, 3, dialog)
+    table.setHorizontalHeaderLabels([
+        tr("snapshot_time"),
+        tr("snapshot_label"),
+        tr("snapshot_changes"),
+    ])
+    table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+    table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+    table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+    table.horizontalHeader().setStretchLastSection(True)
+
+    snapshots = []
+
+    def refresh() -> None:
+        snapshots[:] = list_snapshots(mw.col.path)
+        status_label.setText(get_status_info())
+
+        # Cached: the same model get_status_info() just used
+        limits_model.set_rows(get_status_model().limits)
+        limits_model.sort(limits_header.sortIndicatorSection(), limits_header.sortIndicatorOrder())
+
+        table.setRowCount(len(snapshots))
+        for row, snapshot in enumerate(snapshots):
+            values = (snapshot["created"], snapshot["label"], snapshot["changes"])
+            for column, value in enumerate(values):
+                table.setItem(row, column, QTableWidgetItem(str(value)))
+        table.resizeColumnsToContents()
+
+    def rollback() -> None:
+        row = table.currentRow()
+        if row < 0 or not askUser(tr("snapshot_confirm"), title=tr("snapshot_rollback")):
+            return
+
+        snapshot_id = snapshots[row]["id"]
+
+        def on_success(result: OpResult) -> None:
+            show_result(result.message)
+            refresh()
+
+        CollectionOp(
+            parent=dialog, op=lambda col: run_as_op(lambda: rollback_to_snapshot(snapshot_id), col)
+        ).success(on_success).run_in_background()
+
+    rollback_button = QPushButton(tr("snapshot_rollback"), dialog)
+    rollback_button.clicked.connect(rollback)
+
+    buttons = QHBoxLayout()
+    buttons.addStretch()
+    buttons.addWidget(rollback_button)
+
+    layout = QVBoxLayout(dialog)
+    layout.addWidget(status_label)
+    layout.addWidget(QLabel(tr("status_limits")))
+    layout.addWidget(limits_view, 2)
+    layout.addWidget(QLabel(tr("snapshot_title")))
+    layout.addWidget(table, 1)
+    layout.addLayout(buttons)
+
+    refresh()
+    dialog.show()
+
+
+# Event filters offered by the history dialog: (translation key, events)
+HISTORY_FILTERS = (
+    ("history_all", None),
+    ("history_bury", ("bury", "unbury")),
+    ("history_limits", ("limits", "restore", "backup")),
+    ("history_pause", ("pause",)),
+    ("history_check", ("check", "perf")),
+)
+
+
+def show_history_dialog() -> None:
+    """
+    Show a dialog listing the addon's past actions, filtered by date and type.
+    """
+    dialog = QDialog(mw)
+    dialog.setWindowTitle(tr("title_history"))
+    dialog.resize(800, 500)
+
+    days_box = QSpinBox(dialog)
+    days_box.setRange(1, 3650)
+    days_box.setValue(30)
+
+    filter_box = QComboBox(dialog)
+    for key, _events in HISTORY_FILTERS:
+        filter_box.addItem(tr(key))
+
+    table = QTableWidget(0, 4, dialog)
+    table.setHorizontalHeaderLabels([
+        tr("history_time"),
+        tr("history_event"),
+        tr("history_action"),
+        tr("history_details"),
+    ])
+    table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+    table.horizontalHeader().setStretchLastSection(True)
+
+    def refresh() -> None:
+        log = get_action_log()
+        log.flush()
+        entries = query_history(
+            log.path,
+            days=days_box.value(),
+            events=HISTORY_FILTERS[filter_box.currentIndex()][1],
+            segment_paths=log.segment_paths(),
+        )
+
+        table.setRowCount(len(entries))
+        for row, entry in enumerate(entries):
+            details = json.dumps(entry.get("details", {}), ensure_ascii=False)
+            values = (
+                entry.get("timestamp", ""),
+                get_event(entry),
+                entry.get("action", ""),
+                details,
+            )
+            for column, value in enumerate(values):
+                table.setItem(row, column, QTableWidgetItem(str(value)))
+        table.resizeColumnsToContents()
+
+    days_box.valueChanged.connect(refresh)
+    filter_box.currentIndexChanged.connect(refresh)
+
+    controls = QHBoxLayout()
+    controls.addWidget(QLabel(tr("history_days")))
+    controls.addWidget(days_box)
+    controls.addWidget(QLabel(tr("history_filter")))
+    controls.addWidget(filter_box)
+    controls.addStretch()
+
+    layout = QVBoxLayout(dialog)
+    layout.addLayout(controls)
+    layout.addWidget(table)
+
+    refresh()
+    dialog.show()
+
+
+def run_check_in_background(show_feedback: bool = False) -> None:
     """
-    status = get_status_info()
-    show_info(status)
+    Run the weekend check on a background thread with a progress indicator.
+
+    Only one check can run at a time; a request made while another check
+    is in flight is ignored.
+
+    Args:
+        show_feedback: Passed through to run_automatic_check
+    """
+    global _check_in_progress
+
+    if not mw or not mw.col:
+        return
+
+    if _check_in_progress:
+        if show_feedback:
+            show_tooltip(tr("tooltip_check_running"))
+        return
+
+    _check_in_progress = True
+
+    def on_success(result: OpResult) -> None:
+        global _check_in_progress
+        _check_in_progress = False
+        show_result(result.message)
+        schedule_rollover_check()
+
+    def on_failure(error: Exception) -> None:
+        global _check_in_progress
+        _check_in_progress = False
+        print(f"Weekend Blocker error: {error}")
+        import traceback
+        traceback.print_exception(type(error), error, error.__traceback__)
+        schedule_rollover_check()
+
+    # The returned changes let Anki refresh the deck list itself
+    CollectionOp(
+        parent=mw,
+        op=lambda col: run_as_op(
+            lambda: run_automatic_check(show_feedback=show_feedback), col
+        ),
+    ).success(on_success).failure(on_failure).run_in_background()
+
+
+def schedule_rollover_check() -> None:
+    """
+    (Re)start the timer that runs the check when Anki's next day starts.
+
+    The timer fires once, at the collection's day cutoff (the "next day
+    starts at" hour), so an Anki window left open overnight blocks or
+    restores new cards without a restart. Each check re-arms it.
+    """
+    global _rollover_timer
+
+    if not mw or not mw.col:
+        return
+
+    if _rollover_timer is None:
+        _rollover_timer = QTimer(mw)
+        _rollover_timer.setSingleShot(True)
+        _rollover_timer.timeout.connect(run_check_in_background)
+
+    seconds = max(mw.col.sched.day_cutoff - time.time(), 0) + ROLLOVER_MARGIN_SECONDS
+    _rollover_timer.start(int(seconds * 1000))
+
+
+def stop_rollover_check() -> None:
+    """
+    Stop the rollover timer (when the profile is closed).
+    """
+    if _rollover_timer is not None:
+        _rollover_timer.stop()
 
 
 def run_manual_check() -> None:
     """
     Manually trigger the weekend check.
     """
-    run_automatic_check(show_feedback=True)
+    run_check_in_background(show_feedback=True)
+
+
+def run_action_in_background(action: Callable[[], Optional[str]]) -> None:
+    """
+    Run a menu action as a CollectionOp and show its result.
+
+    The returned changes let Anki refresh the deck list, so the counts
+    shown match the new limits.
+
+    Args:
+        action: Core function returning a message, e.g. pause_all_new_cards
+    """
+    if not mw or not mw.col:
+        return
+
+    def on_success(result: OpResult) -> None:
+        show_result(result.message)
+        refresh_menu_state()
+
+    CollectionOp(
+        parent=mw, op=lambda col: run_as_op(action, col)
+    ).success(on_success).run_in_background()
 
 
 def pause_new_cards_action() -> None:
@@ -135,7 +537,7 @@ def pause_new_cards_action() -> None:
     )
 
     if confirm:
-        pause_all_new_cards()
+        run_action_in_background(pause_all_new_cards)
 
 
 def resume_new_cards_action() -> None:
@@ -154,7 +556,7 @@ def resume_new_cards_action() -> None:
     )
 
     if confirm:
-        resume_all_new_cards()
+        run_action_in_background(resume_all_new_cards)
 
 
 def restore_settings_action() -> None:
@@ -167,7 +569,7 @@ def restore_settings_action() -> None:
     )
 
     if confirm:
-        restore_weekday_limits()
+        run_action_in_background(restore_weekday_limits)
 
 
 def disable_addon_action() -> None:
@@ -183,6 +585,7 @@ def disable_addon_action() -> None:
         config = get_addon_config()
         config["enabled"] = False
         save_addon_config(config)
+        refresh_menu_state()
         show_tooltip(tr("tooltip_disabled"))
 
 
@@ -199,8 +602,9 @@ def enable_addon_action() -> None:
         config = get_addon_config()
         config["enabled"] = True
         save_addon_config(config)
+        refresh_menu_state()
         show_tooltip(tr("tooltip_enabled"))
-        run_automatic_check()
+        run_check_in_background()
 
 
 def show_help_dialog() -> None:
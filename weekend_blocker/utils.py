@@ -6,9 +6,103 @@ Handles logging, date detection, and helper functions.
 import datetime
 import json
 import os
-from typing import Optional
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
 
-from aqt import mw
+from .action_log import TIMESTAMP_FORMAT, ActionLog
+from .schedule import ScheduleRules, is_blocked_day
+
+# Anki's main window when running inside Anki. aqt is only looked up, not
+# imported, so the command-line tool and tests never load the GUI stack.
+mw = getattr(sys.modules.get("aqt"), "mw", None)
+
+# Cached addon configuration (None until first read)
+_config_cache: Optional[dict] = None
+
+# True when the cached configuration has changes not yet written to disk
+_config_dirty: bool = False
+
+# Nesting depth of batched_config_writes() blocks
+_batch_depth: int = 0
+
+# Action log (None until first use)
+_action_log: Optional[ActionLog] = None
+
+# Day name and weekend flag shared by the entries of one buffered block
+_log_context: Optional[dict] = None
+
+# "collection" set by using_collection() on each thread, used instead of
+# mw.col; per thread, so a background operation never leaks into the GUI
+_thread_state = threading.local()
+
+# True when meta.json exists but could not be read, so it is never overwritten
+_config_unreadable: bool = False
+
+ADDON_DIR = os.path.dirname(__file__)
+
+# Lock files older than this are assumed to be left over from a crash
+STALE_LOCK_SECONDS = 3600
+
+# Seconds to wait for another process writing meta.json
+CONFIG_LOCK_TIMEOUT = 10
+
+# Seconds to wait for another process writing actions.log
+LOG_LOCK_TIMEOUT = 10
+
+# Reads of a meta.json that fails to parse before giving up on it
+CONFIG_READ_ATTEMPTS = 5
+
+DEFAULT_CONFIG = {
+    "enabled": True,
+    "manual_pause": False,
+    "blocked_weekdays": [5, 6],
+    "last_run": None,
+    "log_actions": True,
+    "bury_mode": "today",
+    "limit_mode": "auto",
+    "deck_rules": [],
+    "blocked_dates": [],
+    "profile_checks": False
+}
+
+
+def get_collection() -> Any:
+    """
+    Get the collection the addon should work on.
+
+    Returns:
+        Collection: The collection set by using_collection(), otherwise
+            the one open in Anki, or None if there is none
+    """
+    col = getattr(_thread_state, "collection", None)
+    if col is not None:
+        return col
+
+    if mw and mw.col:
+        return mw.col
+
+    return None
+
+
+@contextmanager
+def using_collection(col: Any) -> Iterator[None]:
+    """
+    Make the core functions work on the given collection instead of mw.col.
+
+    Only the calling thread is affected.
+
+    Args:
+        col: An open anki.collection.Collection
+    """
+    previous = getattr(_thread_state, "collection", None)
+    _thread_state.collection = col
+    try:
+        yield
+    finally:
+        _thread_state.collection = previous
 
 
 def get_anki_language() -> str:
@@ -28,27 +122,50 @@ def get_anki_language() -> str:
     if "_" in lang:
         lang = lang.split("_")[0]
 
-    # Map to supported languages (currently 'pt' and 'en')
-    if lang.startswith("pt"):
-        return "pt"
-    else:
-        return "en"  # Default to English for all other languages
+    # Languages without a catalog in locales/ fall back to English
+    return lang
 
 
-def is_weekend() -> bool:
+def get_today() -> datetime.date:
     """
-    Check if today is Saturday (5) or Sunday (6).
+    Get the date the weekend check should use.
+
+    With a collection open this is the scheduler's current day, which
+    only changes at the "next day starts at" hour: at 2 AM on a Saturday
+    with a 4 AM rollover it is still Friday.
 
     Returns:
-        bool: True if today is weekend, False otherwise
+        datetime.date: Today's date
     """
-    today = datetime.datetime.now().weekday()
-    return today in [5, 6]  # Saturday=5, Sunday=6
+    col = get_collection()
+    if not col:
+        return datetime.date.today()
 
+    # The current scheduler day started one day before the next cutoff
+    return datetime.datetime.fromtimestamp(col.sched.day_cutoff - 86400).date()
 
-def get_day_name() -> str:
+
+def is_weekend(date: Optional[datetime.date] = None) -> bool:
     """
-    Get the current day name in the user's language.
+    Check if a date is one of the blocked weekdays
+    (by default Saturday and Sunday, see "blocked_weekdays").
+
+    Args:
+        date: Date to check (defaults to today)
+
+    Returns:
+        bool: True if the date is a blocked day, False otherwise
+    """
+    rules = ScheduleRules.from_config(get_addon_config())
+    return is_blocked_day(date or get_today(), rules)
+
+
+def get_day_name(date: Optional[datetime.date] = None) -> str:
+    """
+    Get the day name in the user's language.
+
+    Args:
+        date: Date to name (defaults to today)
 
     Returns:
         str: Localized day name
@@ -65,79 +182,301 @@ def get_day_name() -> str:
         6: "day_sunday"
     }
 
-    weekday = datetime.datetime.now().weekday()
+    weekday = (date or get_today()).weekday()
     return get_translation(day_keys[weekday])
 
 
-def log_action(action: str, details: Optional[dict] = None) -> None:
+def get_action_log() -> ActionLog:
+    """
+    Get the addon's action log (created on first use).
+
+    The log is shared with the batch workers of the command-line tool, so
+    writes and rotations hold a lock file.
+
+    Returns:
+        ActionLog: Log writing to actions.log in the addon folder
+    """
+    global _action_log
+
+    if _action_log is None:
+        path = os.path.join(ADDON_DIR, "actions.log")
+        _action_log = ActionLog(
+            path, lock=lambda: file_lock(path + ".lock", LOG_LOCK_TIMEOUT)
+        )
+
+    return _action_log
+
+
+def log_action(action: str, details: Optional[dict] = None, event: str = "other") -> None:
     """
     Log an action to the addon's log file.
 
+    Does nothing when the "log_actions" config option is off. Inside
+    buffered_log() entries are only written when the block ends.
+
     Args:
         action: Description of the action taken
         details: Optional dictionary with additional details
+        event: Event type used to filter the history (e.g. "bury", "limits")
     """
-    if not mw or not mw.addonManager:
+    global _log_context
+
+    if not get_addon_config().get("log_actions", True):
         return
 
-    addon_dir = os.path.dirname(__file__)
-    log_file = os.path.join(addon_dir, "actions.log")
+    log = get_action_log()
+
+    # Day name and weekend flag are computed once per buffered block
+    if _log_context is None or not log.buffering:
+        _log_context = {"day": get_day_name(), "is_weekend": is_weekend()}
 
-    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     log_entry = {
-        "timestamp": timestamp,
+        "timestamp": datetime.datetime.now().strftime(TIMESTAMP_FORMAT),
         "action": action,
-        "day": get_day_name(),
-        "is_weekend": is_weekend()
+        "event": event,
+        **_log_context,
     }
 
     if details:
         log_entry["details"] = details
 
     try:
-        with open(log_file, "a", encoding="utf-8") as f:
-            f.write(json.dumps(log_entry, ensure_ascii=False) + "\n")
+        log.append(log_entry)
     except Exception as e:
         print(f"Weekend Blocker: Failed to write log: {e}")
 
 
+@contextmanager
+def buffered_log() -> Iterator[None]:
+    """
+    Collect log entries in memory and write them once when the block ends.
+    """
+    global _log_context
+
+    log = get_action_log()
+    log.begin()
+    try:
+        yield
+    finally:
+        log.end()
+        if not log.buffering:
+            _log_context = None
+
+
 def get_addon_config() -> dict:
     """
     Get the addon's configuration.
 
+    The configuration is read from Anki once and then served from an
+    in-memory cache until invalidate_addon_config() is called.
+
     Returns:
         dict: Configuration dictionary
     """
-    if not mw or not mw.addonManager:
-        return {}
+    global _config_cache
+
+    if _config_cache is not None:
+        return _config_cache
 
-    addon_name = os.path.basename(os.path.dirname(__file__))
-    config = mw.addonManager.getConfig(addon_name)
+    if mw and mw.addonManager:
+        addon_name = os.path.basename(ADDON_DIR)
+        config = mw.addonManager.getConfig(addon_name)
+    else:
+        config = _read_config_file()
 
     if config is None:
-        config = {
-            "enabled": True,
-            "original_limits": {},
-            "manual_pause": False,
-            "last_run": None,
-            "log_actions": True
-        }
+        config = dict(DEFAULT_CONFIG)
 
+    _config_cache = config
     return config
 
 
+@contextmanager
+def file_lock(lock_file: str, timeout: float) -> Iterator[None]:
+    """
+    Hold an exclusive lock file, shared by all processes, while in the block.
+
+    Args:
+        lock_file: Path of the lock file
+        timeout: Seconds to wait for the lock
+
+    Raises:
+        TimeoutError: If the lock could not be taken in time
+    """
+    deadline = time.monotonic() + timeout
+
+    while True:
+        try:
+            fd = os.open(lock_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock_file) > STALE_LOCK_SECONDS:
+                    os.remove(lock_file)
+                    continue
+            except OSError:
+                continue
+
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"locked by another process ({lock_file})")
+            time.sleep(0.2)
+
+    try:
+        os.write(fd, str(os.getpid()).encode("ascii"))
+        os.close(fd)
+        yield
+    finally:
+        try:
+            os.remove(lock_file)
+        except OSError:
+            pass
+
+
+def _read_meta_file(meta_file: str) -> Optional[dict]:
+    """
+    Read meta.json, None if it does not exist.
+
+    A file that fails to parse may be in the middle of being written by
+    Anki, so it is read again a few times before giving up.
+
+    Raises:
+        ValueError: If the file stays unreadable
+    """
+    for attempt in range(CONFIG_READ_ATTEMPTS):
+        try:
+            with open(meta_file, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            error = e
+            time.sleep(0.1 * (attempt + 1))
+
+    raise ValueError(f"could not read {meta_file}: {error}")
+
+
+def _read_config_file() -> Optional[dict]:
+    """
+    Read the configuration without Anki, the same way the add-on manager
+    does: the user's config in meta.json, else the defaults in config.json.
+
+    If meta.json exists but cannot be read, the defaults are used for this
+    session and the user's file is left alone (see _write_config_file()).
+    """
+    global _config_unreadable
+
+    try:
+        meta = _read_meta_file(os.path.join(ADDON_DIR, "meta.json"))
+    except ValueError as e:
+        print(f"Weekend Blocker: {e}; using the default config without saving it")
+        _config_unreadable = True
+        meta = None
+
+    if meta is not None and meta.get("config") is not None:
+        return meta["config"]
+
+    try:
+        with open(os.path.join(ADDON_DIR, "config.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_config_file(config: dict) -> None:
+    """
+    Write the user's configuration to meta.json without Anki.
+
+    Several processes (e.g. batch workers) may save at once, so meta.json
+    is updated under a lock file and replaced atomically: readers never
+    see a half-written file.
+    """
+    if _config_unreadable:
+        return
+
+    meta_file = os.path.join(ADDON_DIR, "meta.json")
+    tmp_file = f"{meta_file}.{os.getpid()}.tmp"
+
+    try:
+        with file_lock(f"{meta_file}.lock", CONFIG_LOCK_TIMEOUT):
+            meta = _read_meta_file(meta_file) or {}
+            meta["config"] = config
+
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(meta, f, ensure_ascii=False)
+            os.replace(tmp_file, meta_file)
+    except (OSError, ValueError) as e:
+        # TimeoutError is an OSError
+        print(f"Weekend Blocker: Failed to write config: {e}")
+
+
 def save_addon_config(config: dict) -> None:
     """
     Save the addon's configuration.
 
+    The cache is updated right away. Inside batched_config_writes() the
+    write to disk is deferred until the outermost block ends.
+
     Args:
         config: Configuration dictionary to save
     """
-    if not mw or not mw.addonManager:
+    global _config_cache, _config_dirty
+
+    _config_cache = config
+    _config_dirty = True
+
+    if _batch_depth == 0:
+        flush_addon_config()
+
+
+def flush_addon_config() -> None:
+    """
+    Write the cached configuration to disk if it has unsaved changes.
+    """
+    global _config_dirty
+
+    if not _config_dirty or _config_cache is None:
         return
 
-    addon_name = os.path.basename(os.path.dirname(__file__))
-    mw.addonManager.writeConfig(addon_name, config)
+    if mw and mw.addonManager:
+        addon_name = os.path.basename(ADDON_DIR)
+        mw.addonManager.writeConfig(addon_name, _config_cache)
+    else:
+        _write_config_file(_config_cache)
+
+    _config_dirty = False
+
+
+def invalidate_addon_config(new_config: Optional[dict] = None) -> None:
+    """
+    Drop the cached configuration so the next read goes back to Anki.
+    Registered as the add-on manager's "config updated" action.
+
+    Args:
+        new_config: Configuration saved by the user, if known
+    """
+    global _config_cache, _config_dirty
+
+    _config_cache = new_config
+    _config_dirty = False
+
+
+@contextmanager
+def batched_config_writes() -> Iterator[None]:
+    """
+    Defer configuration writes until the end of the block.
+
+    However many times the configuration is saved inside the block, it is
+    written to disk at most once, when the outermost block exits.
+    """
+    global _batch_depth
+
+    _batch_depth += 1
+    try:
+        yield
+    finally:
+        _batch_depth -= 1
+        if _batch_depth == 0:
+            flush_addon_config()
 
 
 def show_tooltip(message: str, duration: int = 3000) -> None:
@@ -152,6 +491,22 @@ def show_tooltip(message: str, duration: int = 3000) -> None:
     tooltip(message, duration)
 
 
+def show_result(message: Optional[str]) -> None:
+    """
+    Show the summary message returned by a core operation.
+
+    Multi-line summaries (lists of changes) stay on screen longer than
+    one-line status notes.
+
+    Args:
+        message: Message to display; nothing is shown if empty
+    """
+    if not message:
+        return
+
+    show_tooltip(message, duration=5000 if "\n" in message else 3000)
+
+
 def show_info(message: str, title: str = "Weekend Blocker") -> None:
     """
     Show an info dialog to the user.